@@ -10,14 +10,14 @@
 
 # ### Overview:
 # 
-# This data exploration will provide a broad level overview of the Covid-19 pandemic based on the most recently updated information on Worldometer. Datasets from various sources will be gathered using webscraping with BeautifulSoup and Selenium; data will then be stored in Pandas dataframes, and cleaned.  The final dataset will demonstrate its readiness for use in visualization with MatplotLib, Seaborn, and Plotly, linear regression analysis with Statsmodel Summary, and geomapping with Plotly Express. 
+# This data exploration will provide a broad level overview of the Covid-19 pandemic based on the most recently updated information on Worldometer. Datasets from various sources will be gathered using webscraping with Pandas, lxml and regular expressions; data will then be stored in Pandas dataframes, and cleaned.  The final dataset will demonstrate its readiness for use in visualization with MatplotLib, Seaborn, and Plotly, linear regression analysis with Statsmodel Summary, and geomapping with Plotly Express. 
 
 # ### Steps in Analysis:
 # 
 # 1. Import required libraries
 # 
 # 2. Gather data
-#     - Webscraping with BeautifulSoup and Selenium
+#     - Webscraping with Pandas, lxml and regular expressions
 #     - Reading in CSV files
 #     - Saving information into Pandas dataframes
 # 
@@ -67,24 +67,25 @@
 
 
 # Data Gathering
-import requests                                                 # HTTP requests
-import requests, io                                             # Process I/O data
+import io                                                       # Read downloaded pages from in-memory text
 import urllib.request                                           # Open URL
-from bs4 import BeautifulSoup                                   # Webscraping
+import lxml.html                                                # XPath lookups on single elements
 import pandas as pd                                             # Pandas Dataframes
 import re                                                       # Regular Expressions (regex)
 from numpy import inf                                           # Numpy Infinite Values
 import json                                                     # Parse JSON from strings and false into Python Dictionary
-import js2xml                                                   # Parse Javascript into XML
 import time                                                     # Time access and conversions
-from selenium import webdriver                                  # Automated web browing and scraping                          
-from selenium.webdriver.firefox.options import Options          # Headless browsing
-from selenium.webdriver import firefox
-from webdriverdownloader import GeckoDriverDownloader
-from webdriver_manager.firefox import GeckoDriverManager
-import dataframe_image as dfi
-import aiohttp      
-from pandas.plotting import table
+import shelve                                                   # Persistent dictionary on disk
+from datetime import date                                       # Today's date for cache keys
+import aiohttp                                                  # Asynchronous HTTP requests
+import asyncio                                                  # Event loop for concurrent requests
+import nest_asyncio                                             # Allow asyncio.run inside the notebook's event loop
+
+#--------------------------------------------------------------------------------------------------------------------------------------------------------------------#
+
+# HTTP Cache
+# Worldometer pages are stored on disk keyed by (url, date) so repeated runs on the same day skip the network
+FORCE_REFRESH = False                                           # Set to True to ignore cached pages and scrape live data
 
 #--------------------------------------------------------------------------------------------------------------------------------------------------------------------#
 
@@ -92,12 +93,14 @@ from pandas.plotting import table
 import seaborn as sns                                           # Visualization based on Matplotlib
 import matplotlib as mpl                                        # Visualization for Python
 from matplotlib import pyplot as plt                            # MATLAB style plotting 
+from matplotlib.figure import Figure                            # Figures outside pyplot state
 get_ipython().run_line_magic('matplotlib', 'inline')
 from scipy import stats                                         # Statistical functions
 from scipy.stats import norm                                    # Normal Continuous random variable                          
 import plotly.express as px                                     # Interactive Visualization
 from plotly.subplots import make_subplots                       # Subplots for Plotly
 import plotly.graph_objects as go                               # Plotly Traces
+import plotly.io as pio                                         # Plotly image export
 
 #--------------------------------------------------------------------------------------------------------------------------------------------------------------------#
 
@@ -110,11 +113,15 @@ import statsmodels.api as sm                                    # Used for Corre
 
 # GeoData
 import os, sys                                                  # Use operating system functionality
+import hashlib                                                  # Hash exported csv contents
 import geopandas as gpd                                         # Geospatial data processing
+import fiona                                                    # Shapefile schemas
 from numpy import int64                                         # Process int64
 from geopandas import GeoDataFrame                              # Process Geodataframes
 import geopy                                                    # Python Geocoding tool that gets coordinates
 from geopy.geocoders import Nominatim                           # OpenStreetMap API
+from geopy.extra.rate_limiter import RateLimiter                # Space out geocoding requests
+from concurrent.futures import ThreadPoolExecutor               # Read shapefiles concurrently
 
 #--------------------------------------------------------------------------------------------------------------------------------------------------------------------#
 
@@ -131,6 +138,30 @@ warnings.simplefilter(action='ignore', category=FutureWarning)  # Ignore future
 
 #--------------------------------------------------------------------------------------------------------------------------------------------------------------------#
 
+# Output Mode
+# Run with the environment variable INTERACTIVE=0 to only write figures to the images folder
+INTERACTIVE = os.environ.get('INTERACTIVE', '1') != '0'
+if not INTERACTIVE:
+    mpl.use('Agg')                                              # Render matplotlib figures straight to file
+pio.kaleido.scope.default_format = 'png'                        # Every write_image goes through the same Kaleido scope
+pio.kaleido.scope.mathjax = None                                # No LaTeX in any figure, skip loading MathJax
+
+#--------------------------------------------------------------------------------------------------------------------------------------------------------------------#
+
+# Table Images
+# Tables are drawn with matplotlib instead of screenshotting their HTML in a headless browser
+def export_table(df, path, max_rows=None):
+    if max_rows is not None:
+        df = df.head(max_rows)                                  # Only the first rows are shown
+    cells = pd.DataFrame(df).astype(str).apply(lambda col: col.str.slice(0, 40))   # Keep long cells (geometry) readable
+    fig = Figure(figsize=(max(6, 1.5 * (cells.shape[1] + 1)), 0.3 * len(cells) + 1))
+    ax = fig.add_subplot(111)
+    ax.axis('off')
+    pd.plotting.table(ax, cells, loc='center')
+    fig.savefig(path, bbox_inches='tight', facecolor='w')
+
+#--------------------------------------------------------------------------------------------------------------------------------------------------------------------#
+
 # Confirm Libraries Import
 print('Libraries Imported Successfully.')
 
@@ -146,50 +177,67 @@ print('Libraries Imported Successfully.')
 # 
 # ---
 # 
-# Beautiful Soup library will be used to scrape the table from the Worldometer website. This table will then be stored into a Pandas dataframe called `global_data`. It will contain information about each country's Covid-19 cases. This dataframe will then be concatenated with a GDP dataframe called `country_gdp`, and a land size dataframe called `country_area`, later used to calculate population density
+# Pandas `read_html` will be used to scrape the table from the Worldometer website. This table will then be stored into a Pandas dataframe called `global_data`. It will contain information about each country's Covid-19 cases. This dataframe will then be concatenated with a GDP dataframe called `country_gdp`, and a land size dataframe called `country_area`, later used to calculate population density
 
 # In[2]:
 
 
-# Importing table with BeatifulSoup
-url = 'https://www.worldometers.info/coronavirus/'  # Assign url
-requests.get(url)
-page = requests.get(url).text                       # Store request into page
-
-# Use lxml parser to store nested html structure into Beautiful Soup object
-soup = BeautifulSoup(page, 'lxml')  
-
-# Find table using html tags
-table_data = soup.find('table', id = 'main_table_countries_today')  
-
-headers = []                                
-for i in table_data.find_all('th'):         # This loop will iterate through table and find all table header
-    title = i.text                          # tags <th> then save table header text into title variable
-    headers.append(title)                   # to be appended into headers array
-
-# Create columns from headers strings
-raw_data = pd.DataFrame(columns = headers)  
-
-for j in table_data.find_all('tr')[1:]:     # This loop will iterate through table rows <tr> starting from row 1.
-        row_data = j.find_all('td')         # Each <td> element will be stored inside row data
-        row = [tr.text for tr in row_data]  # Each element will then be stored in row variable as objects
-        length = len(raw_data)
-        raw_data.loc[length] = row
+# Worldometer pages that are parsed without a browser
+url = 'https://www.worldometers.info/coronavirus/'                                  # World table
+url2 = 'https://www.worldometers.info/coronavirus/country/us/'                      # US states table
+url3 = 'https://www.worldometers.info/geography/largest-countries-in-the-world/'    # Country land area table
+
+# State pages with values missing from the US table, keyed by the STATE name in us_data
+BASE = 'https://www.worldometers.info/coronavirus/usa/{}/'
+STATES = {'Hawaii': 'hawaii', 'South Carolina': 'south-carolina', 'Indiana': 'indiana', 'Wisconsin': 'wisconsin',
+          'Alabama': 'alabama', 'Louisiana': 'louisiana', 'Nebraska': 'nebraska', 'Maine': 'maine'}
+
+async def fetch(s, url):
+    key = f'{url}|{date.today()}'
+    if not FORCE_REFRESH and key in page_cache:                 # Today's copy is already on disk
+        return page_cache[key]
+    async with s.get(url) as r:
+        r.raise_for_status()                                    # Never cache an error or block page
+        page_cache[key] = html = await r.text()
+    return html
+
+async def fetch_all(urls):
+    async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=15),
+                                     headers={'User-Agent': 'Mozilla/5.0'}) as s:
+        return await asyncio.gather(*[fetch(s, u) for u in urls])
+
+# Download all pages concurrently on one event loop
+nest_asyncio.apply()
+with shelve.open('worldometer_pages') as page_cache:
+    for key in [k for k in page_cache if not k.endswith(f'|{date.today()}')]:    # Drop pages from previous days
+        del page_cache[key]
+    pages = asyncio.run(fetch_all([url, url2, url3] + [BASE.format(slug) for slug in STATES.values()]))
+page, page2, page3 = pages[:3]
+state_pages = dict(zip(STATES, pages[3:]))
+
+def header_names(html, table_id):
+    # Header text straight from the <th> cells with newlines deleted, read_html would turn them into spaces
+    th = lxml.html.fromstring(html).xpath(f'//table[@id="{table_id}"]/thead//th')
+    return [t.text_content().replace('\n', '') for t in th]
+
+# Read table by its html id straight into a dataframe (hidden continent rows are kept, cells are kept as raw text)
+raw_data = pd.read_html(io.StringIO(page), attrs = {'id': 'main_table_countries_today'}, flavor = 'lxml', 
+                        displayed_only = False, thousands = None, keep_default_na = False)[0].astype(str)
 
 # Get updated date and time string
-a= soup.findAll('div',attrs={"style":"font-size:13px; color:#999; margin-top:5px; text-align:center"})
-
-last_update = (a[0].string)
+tree = lxml.html.fromstring(page)
+last_update = tree.xpath('//div[@style="font-size:13px; color:#999; margin-top:5px; text-align:center"]/text()')[0]
 print(last_update)
 
+SUFFIX = f', {last_update}'                                     # Appended to every plot title
+
 # Save imported data table to 'global_data' dataframe
 global_data = raw_data
 
 # Strip preceding empty spaces in columns and replace spaces with underscore
-global_data.columns= global_data.columns.to_series().apply(lambda x: x.strip())
-global_data.columns = (global_data.columns.str.strip().str.upper().str.replace(' ', '_'))
+global_data.columns = [c.strip().upper().replace(' ', '_') for c in header_names(page, 'main_table_countries_today')]
 
-dfi.export(global_data, 'images/globaldataraw.png', max_rows=10)
+export_table(global_data, 'images/globaldataraw.png', max_rows=10)
 global_data.head()
 
 
@@ -202,10 +250,14 @@ global_data.head()
 # In[3]:
 
 
-# Read in csv and save to 'country_gdp' dataframe
-country_gdp = pd.read_csv("Resources\csvGDP.csv")
+# Read in only the country and GDP per capita columns with explicit datatypes and save to 'country_gdp' dataframe
+# Columns are renamed to be consistent with 'global_data' columns for later concatenation
+country_gdp = pd.read_csv("Resources/csvGDP.csv", 
+                          usecols=['country', 'gdpPerCapita'], 
+                          dtype={'country': 'string', 'gdpPerCapita': 'float64'}).rename(columns = {'country': 'COUNTRY', 
+                                                                                                  'gdpPerCapita': 'GDP_PER_CAPITA'})
 
-dfi.export(country_gdp, 'images/countrygdpraw.png', max_rows=10)
+export_table(country_gdp, 'images/countrygdpraw.png', max_rows=10)
 country_gdp.head()
 
 
@@ -218,36 +270,17 @@ country_gdp.head()
 # In[4]:
 
 
-# Import table with BeatifulSoup
-url3 = 'https://www.worldometers.info/geography/largest-countries-in-the-world/'
-requests.get(url3)
-page3 = requests.get(url3).text
-
-soup3 = BeautifulSoup(page3, 'lxml')
-
-table_data3 = soup3.find('table', id = 'example2')
-
-headers = []
-for i in table_data3.find_all('th'):
-    title = i.text
-    headers.append(title)
-
-raw_data3 = pd.DataFrame(columns = headers)
-
-for j in table_data3.find_all('tr')[1:]:
-         row_data = j.find_all('td')
-         row = [tr.text for tr in row_data]
-         length = len(raw_data3)
-         raw_data3.loc[length] = row
+# Import table with Pandas read_html
+raw_data3 = pd.read_html(io.StringIO(page3), attrs = {'id': 'example2'}, flavor = 'lxml', 
+                         displayed_only = False, thousands = None, keep_default_na = False)[0].astype(str)
 
 # Save imported data table to 'country_area' dataframe
 country_area = raw_data3
 
 # Strip preceding empty spaces in columns and replace spaces with underscore
-country_area.columns= country_area.columns.to_series().apply(lambda x: x.strip())
-country_area.columns = (country_area.columns.str.strip().str.upper().str.replace(' ', '_'))
+country_area.columns = [c.strip().upper().replace(' ', '_') for c in header_names(page3, 'example2')]
 
-dfi.export(country_area, 'images/countryarearaw.png', max_rows=10)
+export_table(country_area, 'images/countryarearaw.png', max_rows=10)
 country_area.head()
 
 
@@ -260,36 +293,18 @@ country_area.head()
 # In[5]:
 
 
-# Import table with BeatifulSoup
-url2 = 'https://www.worldometers.info/coronavirus/country/us/'
-requests.get(url2)
-page2 = requests.get(url2).text
-
-soup2 = BeautifulSoup(page2, 'lxml')
-
-table_data2 = soup2.find('table', id = 'usa_table_countries_today')
-
-headers = []
-for i in table_data2.find_all('th')[0:13]:   # Specify only columns 0 to 12 be appended
-    title = i.text
-    headers.append(title)
-
-raw_data2 = pd.DataFrame(columns = headers)
-
-for j in table_data2.find_all('tr')[1:]:
-         row_data = j.find_all('td')[:13]    # Specify only columns 0 to 12 
-         row = [tr.text for tr in row_data]
-         length = len(raw_data2)
-         raw_data2.loc[length] = row
+# Import table with Pandas read_html
+raw_data2 = pd.read_html(io.StringIO(page2), attrs = {'id': 'usa_table_countries_today'}, flavor = 'lxml', 
+                         displayed_only = False, thousands = None, keep_default_na = False)[0].astype(str)
+raw_data2 = raw_data2.iloc[:, :13]              # Specify only columns 0 to 12
 
 # Save imported data table to 'us_data' dataframe
 us_data = raw_data2
 
 # Strip preceding empty spaces in columns and replace spaces with underscore
-us_data.columns= us_data.columns.to_series().apply(lambda x: x.strip())
-us_data.columns = (us_data.columns.str.strip().str.upper().str.replace(' ', '_'))
+us_data.columns = [c.strip().upper().replace(' ', '_') for c in header_names(page2, 'usa_table_countries_today')[:13]]
 
-dfi.export(us_data, 'images/usdataraw.png', max_rows=10)
+export_table(us_data, 'images/usdataraw.png', max_rows=10)
 us_data.head()
 
 
@@ -322,10 +337,9 @@ us_data.head()
 
 
 # Format data
-global_data=global_data.replace('\n','', regex=True)            # Remove newline characters (regex denotes regular expression) 
-global_data=global_data.replace(',','', regex=True)             # Remove commas
-global_data.columns=global_data.columns.str.replace('\n','')    # Remove newline characters from columns
-global_data = global_data.applymap(lambda x: x.strip('+'))      # 'applymap' applies lambda function to remove '+' from every element in DataFrame
+tbl = str.maketrans('', '', '\n,+')                              # Translation table deleting newlines, commas and '+' signs
+for c in global_data.columns:                                   # Single pass over each string column
+    global_data[c] = global_data[c].str.translate(tbl)
 
 # Drop top buttom unwanted rows
 global_data= global_data.drop(global_data.index[[0,1,2,3,4,5,6,7]]).reset_index(drop=True) # Index will be out of order, reset index
@@ -362,8 +376,8 @@ global_data.dtypes
 # In[9]:
 
 
-# Convert global_data dataframe objects to strings
-global_data = global_data.astype('string')
+# Convert text columns to strings (numeric columns are converted directly from objects below)
+global_data = global_data.astype({'COUNTRY': 'string', 'CONTINENT': 'string'})
 global_data.dtypes
 
 
@@ -371,8 +385,8 @@ global_data.dtypes
 
 
 # Rename row information to keep consistent with 'country_gdp' dataframe
-global_data.COUNTRY= global_data.COUNTRY.replace("USA","United States")
-global_data.COUNTRY= global_data.COUNTRY.replace("UK","United Kingdom")
+global_data.COUNTRY= global_data.COUNTRY.replace({"USA": "United States", 
+                                                  "UK": "United Kingdom"})
 
 
 # In[11]:
@@ -390,16 +404,14 @@ cols = ['TOTALCASES', 'TOTALDEATHS','TOTALRECOVERED', 'ACTIVECASES', 'SERIOUS_CR
        'POPULATION']
 
 # Change global_data datatypes to numeric variables      
-global_data[cols] = global_data[cols].apply(pd.to_numeric, errors='coerce', axis=1)
+global_data[cols] = global_data[cols].apply(pd.to_numeric, errors='coerce')
 
-# Convert NAN and INF values to 0
-global_data.fillna(0, inplace=True)
-global_data.replace(np.nan, 0, inplace=True)
-global_data.replace(np.inf, 0, inplace=True)
+# Convert NAN and INF values to 0 (numeric columns only)
+global_data[cols] = global_data[cols].replace([np.inf, -np.inf], np.nan)
+global_data[cols] = global_data[cols].fillna(0)
 
-# Convert columns 1 to 10 to int
-for col in global_data.columns[1:11]: 
-    global_data[col]=global_data[col].apply(int)
+# Convert numeric columns to int in one vectorized cast
+global_data[cols] = global_data[cols].astype('int64')
 
 global_data.dtypes
 
@@ -407,10 +419,11 @@ global_data.dtypes
 # In[13]:
 
 
-# China's is out of order, so we have to sort TOTALCASES
-global_data = global_data.sort_values(['TOTALCASES'], ascending= False)
+# China's is out of order, so we have to sort TOTALCASES (descending argsort on the int64 array, ties keep table order)
+order = np.argsort(-global_data['TOTALCASES'].to_numpy(), kind='stable')
+global_data = global_data.take(order).reset_index(drop=True)
 
-dfi.export(global_data, 'images/globaldataclean.png', max_rows=10)
+export_table(global_data, 'images/globaldataclean.png', max_rows=10)
 global_data.head()
 
 
@@ -421,13 +434,7 @@ global_data.head()
 # In[14]:
 
 
-# Rename 'country_gdp' columns to be consistent with 'global_data' columns for later concatenation
-country_gdp = country_gdp.rename(columns = {'country': 'COUNTRY', 
-                                            'gdpPerCapita': 'GDP_PER_CAPITA'})
-
-# Drop 'country_gdp' unnecessary columns 
-country_gdp = country_gdp.drop(['rank','imfGDP', 'unGDP', 'pop'], axis=1)
-
+# Unused columns ('rank', 'imfGDP', 'unGDP', 'pop') were skipped when the csv was read
 country_gdp.columns     # Lists column names
 
 
@@ -441,10 +448,8 @@ country_gdp.dtypes
 # In[16]:
 
 
-# Convert 'COUNTRY' variable from 'object' to 'string'
-country_gdp['COUNTRY'] = country_gdp['COUNTRY'].astype('string')
-
-dfi.export(country_gdp, 'images/countrygdpclean.png', max_rows=10)
+# 'COUNTRY' was read as 'string' and 'GDP_PER_CAPITA' as 'float64'
+export_table(country_gdp, 'images/countrygdpclean.png', max_rows=10)
 country_gdp.dtypes
 
 
@@ -455,15 +460,15 @@ country_gdp.dtypes
 # In[17]:
 
 
-# Remove newline characters
-country_area=country_area.replace('\n','', regex=True)
-country_area=country_area.replace(',','', regex=True)
-country_area=country_area.replace('square miles','', regex=True)
-
 # Drop and Rename Columns
 country_area = country_area.drop(['#', 'TOT._AREA_(KM²)', 'TOT._AREA_(MI²)', '%_OF_WORLD_LANDMASS', 'LAND_AREA_(KM²)'], axis=1)
 country_area = country_area.rename(columns={'LAND_AREA_(MI²)': 'LAND_AREA'})
 
+# Remove 'square miles' suffix, then newline characters and commas
+country_area['LAND_AREA'] = country_area['LAND_AREA'].str.replace('square miles', '', regex=False)
+for c in country_area.columns:
+    country_area[c] = country_area[c].str.translate(tbl)
+
 # Convert country_area dataframe objects to strings and numeric
 country_area = country_area.astype('string')
 country_area['LAND_AREA'] = country_area['LAND_AREA'].apply(pd.to_numeric)
@@ -474,24 +479,27 @@ country_area.head()
 
 
 # Rename rows to keep consistent with 'country_gdp' dataframe to successfully merge dataframes
-country_area.COUNTRY= country_area.COUNTRY.replace("United Arab Emirates","UAE")
-country_area.COUNTRY= country_area.COUNTRY.replace("State of Palestine","Palestine")
-country_area.COUNTRY= country_area.COUNTRY.replace("Republic of North Macedonia","North Macedonia")
-country_area.COUNTRY= country_area.COUNTRY.replace("South Korea","S. Korea")
-country_area.COUNTRY= country_area.COUNTRY.replace("Côte d'Ivoire","Ivory Coast")
-country_area.COUNTRY= country_area.COUNTRY.replace("DR Congo","DRC")
-country_area.COUNTRY= country_area.COUNTRY.replace("China Hong Kong SAR","Hong Kong")
-country_area.COUNTRY= country_area.COUNTRY.replace("Central African Republic","CAR")
-country_area.COUNTRY= country_area.COUNTRY.replace("Turks and Caicos Islands","Turks and Caicos")
-country_area.COUNTRY= country_area.COUNTRY.replace("Saint Vincent and the Grenadines","St. Vincent Grenadines")
-country_area.COUNTRY= country_area.COUNTRY.replace("Saint Barthélemy","St. Barth")
-country_area.COUNTRY= country_area.COUNTRY.replace("Brunei Darussalam","Brunei")
-country_area.COUNTRY= country_area.COUNTRY.replace("Wallis and Futuna Islands","Wallis and Futuna")
-country_area.COUNTRY= country_area.COUNTRY.replace("China Macao SAR","Macao")
-country_area.COUNTRY= country_area.COUNTRY.replace("Holy See","Vatican City")
-country_area.COUNTRY= country_area.COUNTRY.replace("Saint Pierre and Miquelon","Saint Pierre Miquelon")
-
-dfi.export(country_area, 'images/countryareaclean.png', max_rows=10)
+COUNTRY_RENAME = {
+    "United Arab Emirates":             "UAE",
+    "State of Palestine":               "Palestine",
+    "Republic of North Macedonia":      "North Macedonia",
+    "South Korea":                      "S. Korea",
+    "Côte d'Ivoire":                    "Ivory Coast",
+    "DR Congo":                         "DRC",
+    "China Hong Kong SAR":              "Hong Kong",
+    "Central African Republic":         "CAR",
+    "Turks and Caicos Islands":         "Turks and Caicos",
+    "Saint Vincent and the Grenadines": "St. Vincent Grenadines",
+    "Saint Barthélemy":                 "St. Barth",
+    "Brunei Darussalam":                "Brunei",
+    "Wallis and Futuna Islands":        "Wallis and Futuna",
+    "China Macao SAR":                  "Macao",
+    "Holy See":                         "Vatican City",
+    "Saint Pierre and Miquelon":        "Saint Pierre Miquelon"}
+
+country_area.COUNTRY= country_area.COUNTRY.replace(COUNTRY_RENAME)     # Rename all countries in one pass
+
+export_table(country_area, 'images/countryareaclean.png', max_rows=10)
 
 
 # ### Concatenation
@@ -503,6 +511,21 @@ dfi.export(country_area, 'images/countryareaclean.png', max_rows=10)
 # In[19]:
 
 
+# Strip will be used on the 'COUNTRY' column in order remove any missed spaces before or after string
+def norm_country(df, col='COUNTRY'):
+    df[col] = df[col].astype('string').str.strip()             # Cast and strip once, right after a dataframe is created
+    return df
+
+for df in (global_data, country_gdp, country_area):
+    norm_country(df)
+
+# Shared categories let the merges match integer category codes instead of hashing strings
+cat = pd.api.types.union_categoricals([global_data['COUNTRY'].astype('category'), 
+                                       country_gdp['COUNTRY'].astype('category'), 
+                                       country_area['COUNTRY'].astype('category')]).categories
+for df in (global_data, country_gdp, country_area):
+    df['COUNTRY'] = pd.Categorical(df['COUNTRY'], categories=cat)
+
 # Merge datasets
 global_data = global_data.merge(country_gdp, on='COUNTRY', how='left')
 global_data.head()
@@ -513,15 +536,13 @@ global_data.head()
 # In[20]:
 
 
-# Death Rate = Total Deaths / Total Cases
-global_data['DEATH_RATE'] = global_data.TOTALDEATHS / global_data.TOTALCASES
-
-# Survival Rate = Total Recovered / Total Cases
-global_data['SURVIVAL_RATE'] = global_data.TOTALRECOVERED / global_data.TOTALCASES
-
-# Percentage of Tests Positive = Total Cases / Total Tests
-global_data['PERCENT_TESTS_POSITIVE'] = global_data.TOTALCASES / global_data.TOTALTESTS
-global_data = global_data.replace([np.inf, -np.inf], 0)     # If numerator is '0', infinite number (inf) will be added. Replace it with '0'
+# Evaluate all three ratios in a single pandas.eval pass
+global_data.eval('''
+DEATH_RATE = TOTALDEATHS / TOTALCASES
+SURVIVAL_RATE = TOTALRECOVERED / TOTALCASES
+PERCENT_TESTS_POSITIVE = TOTALCASES / TOTALTESTS
+''', inplace=True)
+global_data.replace([np.inf, -np.inf], 0, inplace=True)     # If denominator is '0', infinite number (inf) will be added. Replace it with '0'
 global_data.head()
 
 
@@ -535,7 +556,7 @@ global_data.head()
 
 
 # Check for NAN values
-global_data[global_data.isna().any(axis=1)]
+global_data.loc[global_data.isna().to_numpy().any(axis=1)]
 
 
 # In[22]:
@@ -550,19 +571,34 @@ gdp_entry.head()
 
 
 #Export dataframe to csv in order to manually add GDP information
-gdp_entry.to_csv('Resources\gdp_entry.csv', index = False)
+# The csv is only rewritten when its contents change; the md5 of the last export is kept in a sidecar file
+gdp_bytes = gdp_entry.to_csv(index = False).encode()
+gdp_hash = hashlib.md5(gdp_bytes).hexdigest()
+gdp_hash_path = 'Resources/.gdp_entry.md5'
+
+cached_hash = None
+if os.path.exists('Resources/gdp_entry.csv') and os.path.exists(gdp_hash_path):
+    with open(gdp_hash_path) as f:
+        cached_hash = f.read().strip()
+
+if cached_hash != gdp_hash:
+    with open('Resources/gdp_entry.csv', 'wb') as f:
+        f.write(gdp_bytes)
+    with open(gdp_hash_path, 'w') as f:
+        f.write(gdp_hash)
 
 
 # In[24]:
 
 
 # Add updated csv to dataframe
-gdp_df_update= pd.read_csv('Resources\gdp_entry2.csv')
+gdp_df_update= pd.read_csv('Resources/gdp_entry2.csv', dtype={'COUNTRY': 'string', 'GDP_PER_CAPITA': 'float64'})
 
 # Drop current country_gdp column
 global_data= global_data.drop('GDP_PER_CAPITA', axis=1)
 
 # Merge updated gdp dataframe back into 'global_data'
+gdp_df_update['COUNTRY'] = pd.Categorical(gdp_df_update['COUNTRY'].str.strip(), categories=cat)
 global_data = global_data.merge(gdp_df_update, on='COUNTRY', how='left')
 
 # Drop the rows that are ships and not countries
@@ -574,18 +610,19 @@ global_data.head()
 # In[25]:
 
 
-# Merge 'country_area' with 'global_data' 
-# Strip will be used on the 'COUNTRY' column in order remove any missed spaces before or after string
-global_data.COUNTRY = global_data.COUNTRY.str.strip()
-country_area.COUNTRY = country_area.COUNTRY.str.strip()
+# Merge 'country_area' with 'global_data' ('COUNTRY' was stripped and categorized before the first merge)
+global_data['COUNTRY'] = pd.Categorical(global_data['COUNTRY'], categories=cat)
 global_data = global_data.merge(country_area, on='COUNTRY', how='left')
 
+# Back to 'string' so plots only show the countries in each dataframe, not every category
+global_data['COUNTRY'] = global_data['COUNTRY'].astype('string')
+
 
 # In[26]:
 
 
-# Percentage of Tests Positive
-global_data['POPULATION_DENSITY'] = global_data.POPULATION / global_data.LAND_AREA
+# Population Density = Population / Land Area
+global_data.eval('POPULATION_DENSITY = POPULATION / LAND_AREA', inplace=True)
 
 
 # In[27]:
@@ -594,25 +631,14 @@ global_data['POPULATION_DENSITY'] = global_data.POPULATION / global_data.LAND_AR
 # Check dataframe for null values
 globalisnull = global_data.isnull().any()
 
-
-#create a subplot without frame
-plot = plt.subplot(111, frame_on=False)
-
-#remove axis
-plot.xaxis.set_visible(False) 
-plot.yaxis.set_visible(False) 
-
-#create the table plot and position it in the upper left corner
-table(plot, globalisnull, loc='upper left')
-
-#save the plot as a png file
-plt.savefig('images/globalisnull.png', bbox_inches = "tight")
+# Export null check table as png
+export_table(globalisnull.to_frame('is_null'), 'images/globalisnull.png')
 
 
 # In[28]:
 
 
-dfi.export(global_data, 'images/globaldataconcat.png', max_rows=10)
+export_table(global_data, 'images/globaldataconcat.png', max_rows=10)
 global_data.head()
 
 
@@ -626,10 +652,8 @@ global_data.head()
 
 
 #remove newline characters and special characters in dataframe
-us_data=us_data.replace('\n','', regex=True)
-us_data=us_data.replace(',','', regex=True)
-us_data.columns=us_data.columns.str.replace('\n','')
-us_data = us_data.applymap(lambda x: x.strip('+'))
+for c in us_data.columns:
+    us_data[c] = us_data[c].str.translate(tbl)
 us_data.head()
 
 
@@ -665,8 +689,8 @@ us_data.columns
 # In[32]:
 
 
-# Convert global_data dataframe objects to strings
-us_data = us_data.astype('string')
+# Convert text column to string (numeric columns are converted directly from objects below)
+us_data = us_data.astype({'STATE': 'string'})
 us_data.dtypes
 
 
@@ -678,11 +702,10 @@ cols = ['TOTALCASES', 'TOTALDEATHS','TOTALRECOVERED', 'ACTIVECASES',
        'TOTCASES_PER_1M', 'DEATH_PER_1M', 'TOTALTESTS', 'TESTS_PER_1M',
        'POPULATION']
        
-us_data[cols] = us_data[cols].apply(pd.to_numeric, errors='coerce', axis=1)
+us_data[cols] = us_data[cols].apply(pd.to_numeric, errors='coerce')
 
-# Convert columns to integer
-for col in us_data.columns[1:]: 
-    us_data[col]=pd.Series(us_data[col], dtype=int)
+# Convert columns to integer in one vectorized cast (nullable 'Int64' keeps the missing state values as <NA>)
+us_data[cols] = us_data[cols].astype('Int64')
 
 us_data.dtypes
 
@@ -692,14 +715,13 @@ us_data.dtypes
 
 # ADD COLUMNS
 
-# Death Rate per Country
-us_data['DEATH_RATE'] = us_data.TOTALDEATHS / us_data.TOTALCASES
-
-# Survival Rate
-us_data['SURVIVAL_RATE'] = us_data.TOTALRECOVERED / us_data.TOTALCASES
-
-# Percentage of Tests Positive
-us_data['PERCENT_TESTS_POSITIVE'] = us_data.TOTALCASES / us_data.TOTALTESTS
+# Death Rate, Survival Rate and Percentage of Tests Positive in one pass
+# (python engine because numexpr can't read the nullable 'Int64' columns)
+us_data.eval('''
+DEATH_RATE = TOTALDEATHS / TOTALCASES
+SURVIVAL_RATE = TOTALRECOVERED / TOTALCASES
+PERCENT_TESTS_POSITIVE = TOTALCASES / TOTALTESTS
+''', engine='python', inplace=True)
 
 #us_data = us_data.replace([np.inf, -np.inf], 0)
 us_data.head()
@@ -714,356 +736,46 @@ us_data.head()
 # In[35]:
 
 
-us_data[us_data.isna().any(axis =1)]
+us_data.loc[us_data.isna().to_numpy().any(axis=1)]
 
 
-# The above states are are missing values in three columns. They will be added using BeautifulSoup from their individual state pages.
+# The above states are are missing values in three columns. They will be added using regular expressions on their individual state pages.
 
-# ### Get Hawaii Recovered Cases
+# ### Get Recovered and Active Cases
 # 
 # ---
 # 
-# The number of recovered cases can be found directly on the state's page in the `span` tag. It will be parsed using an lxml interpreter and stored in a soup variable. The variable `a` will store the elements of the `class: "maincounter-number"` tag, and then `find` will be used on `a` to find the contents of the `span` tag. This process will be replicated for South Carolina. District of Columbia's GDP Per Capita will be found manually and added to the dataframe
-
-# In[36]:
-
-
-url4 = 'https://www.worldometers.info/coronavirus/usa/hawaii/'
-requests.get(url4)
-page4 = requests.get(url4).text
-
-soup4 = BeautifulSoup(page4, 'lxml')
-# Get updated date and time string
-a= soup4.find('div',attrs={"class": "maincounter-number", "style": "color:#8ACA2B "})
-
-hawaii_recovered = a.find('span').text
-hawaii_recovered = hawaii_recovered.replace(",", "")
-hawaii_recovered = int(hawaii_recovered)
-print(hawaii_recovered)
-
-
-# ### Get Hawaii Active Cases
-# 
-# ---
+# The number of recovered cases can be found directly on each state's page in the `span` tag. Since only one number is needed, a precompiled regular expression will capture the text of the `span` inside the green `class: "maincounter-number"` tag instead of parsing the whole page.
 # 
-# The information for Hawaii's active cases is stored in an interactive table on the state's website. `Selenium` will be used in order to browse the page using a Firefox webdriver. The elements of the JavaScript `Highchart.chart tag` will be stored in the variable `temp`. The data array will store all elements of `series`, which contains the number of active cases over time. The most recently updated value for Hawaii's active cases will be used. This process will be replicated for South Carolina.
-
-# In[37]:
-
-
-website = "https://www.worldometers.info/coronavirus/usa/hawaii/"
-
-option = Options()
-option.headless = True
-driver = webdriver.Firefox(options= option)
-driver.get(website)
-time.sleep(5)
-
-temp = driver.execute_script('return window.Highcharts.charts[3]'
-                             '.series[0].options.data')
-data = [item for item in temp]
-hawaii_active = (data[-1])
-print(hawaii_active)
-driver.quit()
-
-
-# ### Get South Carolina Recovered Cases
+# The information for active cases is stored in an interactive chart on each state's website. The chart's data is written into the page source as a JavaScript `Highcharts.chart` literal, so it can be read from the page that was already downloaded without running a browser. A regular expression will capture the `data` array of the active cases chart's `series`, which contains the number of active cases over time, and `json` will parse it into a list. The most recently updated value for active cases will be used.
 # 
-# ---
-
-# In[38]:
-
-
-url5 = 'https://www.worldometers.info/coronavirus/usa/south-carolina/'
-requests.get(url5)
-page5 = requests.get(url5).text
-soup5 = BeautifulSoup(page5, 'lxml')
-# Get updated date and time string
-a= soup5.find('div',attrs={"class": "maincounter-number", "style": "color:#8ACA2B "})
-
-scarolina_recovered = a.find('span').text
-scarolina_recovered = scarolina_recovered.replace(",", "")
-scarolina_recovered = int(scarolina_recovered)
-print(scarolina_recovered)
-
-
-# ### Get South Carolina Active Cases
-# 
-# ---
-
-# In[39]:
-
-
-website = "https://www.worldometers.info/coronavirus/usa/south-carolina/"
-
-option = Options()
-option.headless= True
-driver = webdriver.Firefox(options= option)
-driver.get(website)
-time.sleep(5)
-
-temp = driver.execute_script('return window.Highcharts.charts[3]'
-                             '.series[0].options.data')
-                             
-data = [item for item in temp]
-scarolina_active = (data[-1])
-scarolina_active = int(scarolina_active)
-print(scarolina_active)
-driver.quit()
-
-
-# ### Get Indiana Recovered Cases
-# 
-# ---
-
-# In[40]:
-
-
-url6 = 'https://www.worldometers.info/coronavirus/usa/indiana/'
-requests.get(url6)
-page6 = requests.get(url6).text
-soup6 = BeautifulSoup(page6, 'lxml')
-# Get updated date and time string
-a= soup6.find('div',attrs={"class": "maincounter-number", "style": "color:#8ACA2B "})
-
-indiana_recovered = a.find('span').text
-indiana_recovered = indiana_recovered.replace(",", "")
-indiana_recovered = int(indiana_recovered)
-print(indiana_recovered)
-
-
-# ### Get Indiana Active Cases
-# 
-# ---
-
-# In[41]:
-
-
-website = "https://www.worldometers.info/coronavirus/usa/indiana/"
-
-option = Options()
-option.headless= True
-driver = webdriver.Firefox(options= option)
-driver.get(website)
-time.sleep(5)
-
-temp = driver.execute_script('return window.Highcharts.charts[3]'
-                             '.series[0].options.data')
-                             
-data = [item for item in temp]
-indiana_active = (data[-1])
-indiana_active = int(indiana_active)
-print(indiana_active)
-driver.quit()
-
-
-# ### Get Wisconsin Recovered
-# 
-# ---
-
-# In[42]:
-
-
-url7 = 'https://www.worldometers.info/coronavirus/usa/wisconsin/'
-requests.get(url7)
-page7 = requests.get(url7).text
-soup7 = BeautifulSoup(page7, 'lxml')
-# Get updated date and time string
-a= soup7.find('div',attrs={"class": "maincounter-number", "style": "color:#8ACA2B "})
-
-wisconsin_recovered = a.find('span').text
-wisconsin_recovered = wisconsin_recovered.replace(",", "")
-wisconsin_recovered = int(wisconsin_recovered)
-print(wisconsin_recovered)
-
-
-# ### Get Wisconsin Active
-# 
-# ---
-
-# In[43]:
-
-
-website = "https://www.worldometers.info/coronavirus/usa/wisconsin/"
-
-option = Options()
-option.headless= True
-driver = webdriver.Firefox(options= option)
-driver.get(website)
-time.sleep(5)
-
-temp = driver.execute_script('return window.Highcharts.charts[3]'
-                             '.series[0].options.data')
-                             
-data = [item for item in temp]
-wisconsin_active = (data[-1])
-wisconsin_active = int(wisconsin_active)
-print(wisconsin_active)
-driver.quit()
-
-
-# alabamarecovered
-
-# In[44]:
-
-
-url8 = 'https://www.worldometers.info/coronavirus/usa/alabama/'
-requests.get(url8)
-page8 = requests.get(url8).text
-soup8 = BeautifulSoup(page8, 'lxml')
-# Get updated date and time string
-a= soup8.find('div',attrs={"class": "maincounter-number", "style": "color:#8ACA2B "})
-
-alabama_recovered = a.find('span').text
-alabama_recovered = alabama_recovered.replace(",", "")
-alabama_recovered = int(alabama_recovered)
-print(alabama_recovered)
-
-
-# alabama acive
-
-# In[45]:
-
-
-website = "https://www.worldometers.info/coronavirus/usa/alabama/"
-
-option = Options()
-option.headless= True
-driver = webdriver.Firefox(options= option)
-driver.get(website)
-time.sleep(5)
-
-temp = driver.execute_script('return window.Highcharts.charts[3]'
-                             '.series[0].options.data')
-                             
-data = [item for item in temp]
-alabama_active = (data[-1])
-alabama_active = int(alabama_active)
-print(alabama_active)
-driver.quit()
-
-
-# lousiana rec
-
-# In[46]:
-
-
-url9 = 'https://www.worldometers.info/coronavirus/usa/louisiana/'
-requests.get(url9)
-page9 = requests.get(url9).text
-soup9 = BeautifulSoup(page9, 'lxml')
-# Get updated date and time string
-a= soup9.find('div',attrs={"class": "maincounter-number", "style": "color:#8ACA2B "})
-
-louisiana_recovered = a.find('span').text
-louisiana_recovered = louisiana_recovered.replace(",", "")
-louisiana_recovered = int(louisiana_recovered)
-print(louisiana_recovered)
-
-
-# louisiana active
-
-# In[47]:
-
-
-website = "https://www.worldometers.info/coronavirus/usa/louisiana/"
-
-option = Options()
-option.headless= True
-driver = webdriver.Firefox(options= option)
-driver.get(website)
-time.sleep(5)
-
-temp = driver.execute_script('return window.Highcharts.charts[3]'
-                             '.series[0].options.data')
-                             
-data = [item for item in temp]
-louisiana_active = (data[-1])
-louisiana_active = int(louisiana_active)
-print(louisiana_active)
-driver.quit()
-
-
-# nebraska rec
-
-# In[48]:
-
-
-url10 = 'https://www.worldometers.info/coronavirus/usa/nebraska/'
-requests.get(url10)
-page10 = requests.get(url10).text
-soup10 = BeautifulSoup(page10, 'lxml')
-# Get updated date and time string
-a= soup10.find('div',attrs={"class": "maincounter-number", "style": "color:#8ACA2B "})
-
-nebraska_recovered = a.find('span').text
-nebraska_recovered = nebraska_recovered.replace(",", "")
-nebraska_recovered = int(nebraska_recovered)
-print(nebraska_recovered)
-
-
-# nebraska active
-
-# In[49]:
-
-
-website = "https://www.worldometers.info/coronavirus/usa/nebraska/"
-
-option = Options()
-option.headless= True
-driver = webdriver.Firefox(options= option)
-driver.get(website)
-time.sleep(5)
-
-temp = driver.execute_script('return window.Highcharts.charts[3]'
-                             '.series[0].options.data')
-                             
-data = [item for item in temp]
-nebraska_active = (data[-1])
-nebraska_active = int(nebraska_active)
-print(nebraska_active)
-driver.quit()
-
-
-# maine recovered
-
-# In[50]:
-
-
-url11 = 'https://www.worldometers.info/coronavirus/usa/maine/'
-requests.get(url11)
-page11 = requests.get(url11).text
-soup11 = BeautifulSoup(page11, 'lxml')
-# Get updated date and time string
-a= soup11.find('div',attrs={"class": "maincounter-number", "style": "color:#8ACA2B "})
-
-maine_recovered = a.find('span').text
-maine_recovered = maine_recovered.replace(",", "")
-maine_recovered = int(maine_recovered)
-print(maine_recovered)
+# The same process is run for every state in `STATES`. District of Columbia's GDP Per Capita will be found manually and added to the dataframe
 
+# In[36]:
 
-# maine active
 
-# In[51]:
+# Recovered counter is the span inside the green 'maincounter-number' div, attributes in any order
+REC_RE = re.compile(r'<div(?=[^>]*class="maincounter-number")(?=[^>]*color:\s*#8ACA2B)[^>]*>\s*<span[^>]*>\s*([\d,]+)\s*</span>')
+# Capture the data array of the active cases chart from the page source
+ACTIVE_RE = re.compile(r"Highcharts\.chart\('graph-active-cases-total'.*?series:\s*\[\{.*?data:\s*(\[.*?\])", re.S)
 
+def parse_recovered(state, html):
+    match = REC_RE.search(html)
+    if match is None:
+        raise ValueError(f'No recovered counter found on the {state} page')
+    return int(match.group(1).replace(',', ''))
 
-website = "https://www.worldometers.info/coronavirus/usa/maine/"
+def parse_active(state, html):
+    match = ACTIVE_RE.search(html)
+    if match is None:
+        raise ValueError(f'No active cases chart found on the {state} page')
+    return int(json.loads(match.group(1))[-1])
 
-option = Options()
-option.headless= True
-driver = webdriver.Firefox(options= option)
-driver.get(website)
-time.sleep(5)
+def scrape_state(state, html):
+    return parse_recovered(state, html), parse_active(state, html)
 
-temp = driver.execute_script('return window.Highcharts.charts[3]'
-                             '.series[0].options.data')
-                             
-data = [item for item in temp]
-maine_active = (data[-1])
-maine_active = int(maine_active)
-print(maine_active)
-driver.quit()
+results = {state: scrape_state(state, html) for state, html in state_pages.items()}
+print(results)
 
 
 # In[52]:
@@ -1078,42 +790,17 @@ us_data.STATE = us_data.STATE.str.strip()
 us_data=us_data.set_index('STATE')
 
 
-# ### REPLACE VALUES FOR HAWAII AND SOUTH CAROLINA
+# ### REPLACE VALUES FOR MISSING STATES
 
 # In[54]:
 
 
-us_data.at['Hawaii','TOTALRECOVERED'] = hawaii_recovered                                                                   # Locate cell and replace with value
-us_data.at['Hawaii','ACTIVECASES'] = hawaii_active                                                                                 
-us_data.at['Hawaii','SURVIVAL_RATE'] = (hawaii_recovered / (us_data.at['Hawaii', 'TOTALCASES']))                          # Replace with calculation
-
-us_data.at['South Carolina','TOTALRECOVERED'] = scarolina_recovered
-us_data.at['South Carolina','ACTIVECASES'] = scarolina_active
-us_data.at['South Carolina','SURVIVAL_RATE'] = (scarolina_recovered / (us_data.at['South Carolina', 'TOTALCASES']))
-
-us_data.at['Indiana','TOTALRECOVERED'] = indiana_recovered
-us_data.at['Indiana','ACTIVECASES'] = indiana_active
-us_data.at['Indiana','SURVIVAL_RATE'] = (indiana_recovered / (us_data.at['Indiana', 'TOTALCASES']))
-
-us_data.at['Wisconsin','TOTALRECOVERED'] = wisconsin_recovered
-us_data.at['Wisconsin','ACTIVECASES'] = wisconsin_active
-us_data.at['Wisconsin','SURVIVAL_RATE'] = (wisconsin_recovered / (us_data.at['Wisconsin', 'TOTALCASES']))
-
-us_data.at['Alabama','TOTALRECOVERED'] = alabama_recovered
-us_data.at['Alabama','ACTIVECASES'] = alabama_active
-us_data.at['Alabama','SURVIVAL_RATE'] = (alabama_recovered / (us_data.at['Alabama', 'TOTALCASES']))
+# One row of scraped values per state, aligned with us_data on the STATE index
+patch = pd.DataFrame.from_dict(results, orient='index', columns=['TOTALRECOVERED', 'ACTIVECASES'])
+patch['SURVIVAL_RATE'] = patch['TOTALRECOVERED'] / us_data.loc[patch.index, 'TOTALCASES']                 # Replace with calculation
 
-us_data.at['Louisiana','TOTALRECOVERED'] = louisiana_recovered
-us_data.at['Louisiana','ACTIVECASES'] = louisiana_active
-us_data.at['Louisiana','SURVIVAL_RATE'] = (louisiana_recovered / (us_data.at['Louisiana', 'TOTALCASES']))
-
-us_data.at['Nebraska','TOTALRECOVERED'] = nebraska_recovered
-us_data.at['Nebraska','ACTIVECASES'] = nebraska_active
-us_data.at['Nebraska','SURVIVAL_RATE'] = (nebraska_recovered / (us_data.at['Nebraska', 'TOTALCASES']))
-
-us_data.at['Maine','TOTALRECOVERED'] = maine_recovered
-us_data.at['Maine','ACTIVECASES'] = maine_active
-us_data.at['Maine','SURVIVAL_RATE'] = (maine_recovered / (us_data.at['Maine', 'TOTALCASES']))
+us_data.update(patch)                                                                                       # Locate cells and replace with values
+us_data = us_data.astype({'TOTALRECOVERED': 'Int64', 'ACTIVECASES': 'Int64', 'SURVIVAL_RATE': 'Float64'})  # update() does not keep nullable dtypes
 
 
 # In[55]:
@@ -1123,18 +810,8 @@ us_data.at['Maine','SURVIVAL_RATE'] = (maine_recovered / (us_data.at['Maine', 'T
 usdataisnull = us_data.isnull().any()
 usdataisnull
 
-#create a subplot without frame
-plot = plt.subplot(111, frame_on=False)
-
-#remove axis
-plot.xaxis.set_visible(False) 
-plot.yaxis.set_visible(False) 
-
-#create the table plot and position it in the upper left corner
-table(plot, usdataisnull,loc='upper left')
-
-#save the plot as a png file
-plt.savefig('images/usdataisnull.png', bbox_inches = "tight")
+# Export null check table as png
+export_table(usdataisnull.to_frame('is_null'), 'images/usdataisnull.png')
 
 
 # In[56]:
@@ -1143,7 +820,7 @@ plt.savefig('images/usdataisnull.png', bbox_inches = "tight")
 # Reset index
 us_data = us_data.reset_index()
 
-dfi.export(us_data, 'images/usdataclean.png', max_rows=10)
+export_table(us_data, 'images/usdataclean.png', max_rows=10)
 us_data.tail()
 
 
@@ -1182,67 +859,29 @@ top_cases.head()
 # In[58]:
 
 
-# Use Seaborn and Matplotlib to create bar subplot for all variable in 'topcases' dataframe
-
-fig, ax = plt.subplots(8, 2, figsize= (25,25))                                                          # Plots with 8 row, 2 column dimension for subplots
-
-ax1 = sns.barplot(top_cases["COUNTRY"], top_cases["TOTALCASES"], data= top_cases, ax = ax[0,0])         # Subplot with 'COUNTRY' x variable, 'TOTALCASES' y variable
-ax1.set_title("Total Cases", fontsize=15)
-
-ax2 = sns.barplot(top_cases["COUNTRY"], top_cases["TOTALDEATHS"], data= top_cases, ax = ax[0,1])
-ax2.set_title("Total Deaths", fontsize=15)
-
-ax3 = sns.barplot(top_cases["COUNTRY"], top_cases["TOTALRECOVERED"], data= top_cases, ax = ax[1,0])
-ax3.set_title("Total Recovered", fontsize=15)
+# Use Matplotlib to create bar subplot for all variable in 'topcases' dataframe (one bar per country, so no seaborn estimator is needed)
+BAR_METRICS = [('TOTALCASES', 'Total Cases'), ('TOTALDEATHS', 'Total Deaths'),
+               ('TOTALRECOVERED', 'Total Recovered'), ('ACTIVECASES', 'Active Cases'),
+               ('SERIOUS_CRITICAL', 'Serious and Critical Cases'), ('TOTCASES_PER_1M', 'Total Cases Per Million'),
+               ('DEATH_PER_1M', 'Total Deaths Per Million'), ('TOTALTESTS', 'Total Tests'),
+               ('TESTS_PER_1M', 'Total Tests Per Million'), ('POPULATION', 'Population'),
+               ('DEATH_RATE', 'Death Rate'), ('SURVIVAL_RATE', 'Survival Rate'),
+               ('PERCENT_TESTS_POSITIVE', 'Percent of Tests Positive'), ('GDP_PER_CAPITA', 'GDP per Capita'),
+               ('POPULATION_DENSITY', 'Population Density')]
 
-ax4 = sns.barplot(top_cases["COUNTRY"], top_cases["ACTIVECASES"], data= top_cases, ax = ax[1,1])
-ax4.set_title("Active Cases", fontsize=15)
+fig, axes = plt.subplots(8, 2, figsize= (25,25))                                                        # Plots with 8 row, 2 column dimension for subplots
+colors = sns.color_palette(n_colors=len(top_cases))                                                     # Same bar colors as seaborn's default palette
 
-ax5 = sns.barplot(top_cases["COUNTRY"], top_cases["SERIOUS_CRITICAL"], data= top_cases, ax = ax[2,0])
-ax5.set_title("Serious and Critical Cases", fontsize=15)
-
-ax6 = sns.barplot(top_cases["COUNTRY"], top_cases["TOTCASES_PER_1M"], data= top_cases, ax = ax[2,1])
-ax6.set_title("Total Cases Per Million", fontsize=15)
-
-ax7 = sns.barplot(top_cases["COUNTRY"], top_cases["DEATH_PER_1M"], data= top_cases, ax = ax[3,0])
-ax7.set_title("Total Deaths Per Million", fontsize=15)
-
-ax8 = sns.barplot(top_cases["COUNTRY"], top_cases["TOTALTESTS"], data= top_cases, ax = ax[3,1])
-ax8.set_title("Total Tests", fontsize=15)
-
-ax9 = sns.barplot(top_cases["COUNTRY"], top_cases["TESTS_PER_1M"], data= top_cases, ax = ax[4,0])
-ax9.set_title("Total Tests Per Million", fontsize=15)
-
-ax10 = sns.barplot(top_cases["COUNTRY"], top_cases["POPULATION"], data= top_cases, ax = ax[4,1])
-ax10.set_title("Population", fontsize=15)
-
-ax11 = sns.barplot(top_cases["COUNTRY"], top_cases["DEATH_RATE"], data= top_cases, ax = ax[5,0])
-ax11.set_title("Death Rate", fontsize=15)
-
-ax12 = sns.barplot(top_cases["COUNTRY"], top_cases["SURVIVAL_RATE"], data= top_cases, ax = ax[5,1])
-ax12.set_title("Survival Rate", fontsize=15)
-
-ax13 = sns.barplot(top_cases["COUNTRY"], top_cases["PERCENT_TESTS_POSITIVE"], data= top_cases, ax = ax[6,0])
-ax13.set_title("Percent of Tests Positive", fontsize=15)
-
-ax14 = sns.barplot(top_cases["COUNTRY"], top_cases["GDP_PER_CAPITA"], data= top_cases, ax = ax[6,1])
-ax14.set_title("GDP per Capita", fontsize=15)
-
-ax15 = sns.barplot(top_cases["COUNTRY"], top_cases["POPULATION_DENSITY"], data= top_cases, ax= ax[7,0])
-ax15.set_title("Population Density", fontsize=15)
-
-ax16 = sns.barplot(top_cases["COUNTRY"], top_cases["POPULATION_DENSITY"], data= top_cases, ax= ax[7,1])
-ax16.set_title("Population Density", fontsize=15)
-
-# Convert y axis label from 'e' notation to plain
-for ax in ax.flat:
-    ax.ticklabel_format(axis='y', style = 'plain') 
+for ax, (col, title) in zip(axes.flat, BAR_METRICS):
+    ax.bar(top_cases['COUNTRY'], top_cases[col], color=colors)                                          # Subplot with 'COUNTRY' x variable, metric y variable
+    ax.set_title(title, fontsize=15)
+    ax.ticklabel_format(axis='y', style = 'plain')                                                      # Convert y axis label from 'e' notation to plain
 
 # Delete empty subplot
-fig.delaxes(ax = ax16)
+fig.delaxes(ax = axes[7,1])
 
 
-fig.suptitle('TOP TEN COUNTRIES BAR PLOTS' + ', ' + last_update, fontsize = 30)     # Barchart title
+fig.suptitle(f'TOP TEN COUNTRIES BAR PLOTS{SUFFIX}', fontsize = 30)     # Barchart title
 fig.tight_layout(pad=0.6, w_pad=0.5, h_pad=3)                                       # Padding
 fig.subplots_adjust(top=.92)                                                        # Space between title and plots
 
@@ -1258,114 +897,39 @@ fig.savefig('images/toptenbarplot.png', facecolor='w')
 # In[59]:
 
 
+# Column, subplot title and trace tag for each pie chart, in plot order
+PIE_METRICS = [('TOTALCASES', 'Confirmed Cases', 'T_Cases'), ('DEATH_RATE', 'Death Rate', 'Death Rate'),
+               ('SURVIVAL_RATE', 'Survival Rate', 'Survival'), ('PERCENT_TESTS_POSITIVE', 'Percent of Tests Positive', 'Tests Pos'),
+               ('TOTALDEATHS', 'Total Deaths', 'T_Deaths'), ('TOTALRECOVERED', 'Total Recovered', 'T_Recovered'),
+               ('ACTIVECASES', 'Active Cases', 'Active'), ('SERIOUS_CRITICAL', 'Serious', 'Serious'),
+               ('DEATH_PER_1M', 'Deaths Per Million', 'DeathsPM'), ('TOTALTESTS', 'Total Tests', 'T_Tests'),
+               ('TESTS_PER_1M', 'Tests Per Million', 'TestsPM'), ('POPULATION', 'Population', 'Population'),
+               ('POPULATION_DENSITY', 'Population Density', 'Population Density')]
+
 fig = make_subplots(rows=7, 
                     cols=2, 
-                    specs=[[{"type": "pie"}, {"type": "pie"}], [{"type": "pie"}, {"type": "pie"}], [{"type": "pie"}, {"type": "pie"}], [{"type": "pie"},                                          {"type":"pie"}], [{"type": "pie"}, {"type": "pie"}], [{"type": "pie"}, {"type": "pie"}], [{"type": "pie"}, {"type": "pie"}]], 
-                    subplot_titles=('Confirmed Cases', 'Death Rate', 'Survival Rate', 'Percent of Tests Positive', 'Total Deaths', 'Total Recovered', 'Active Cases',                                    'Serious', 'Deaths Per Million', 'Total Tests', 'Tests Per Million', 'Population', 'Population Density'), 
+                    specs=[[{"type": "pie"}, {"type": "pie"}]] * 7, 
+                    subplot_titles=[title for _, title, _ in PIE_METRICS], 
                     vertical_spacing=0.05,)
 
 # Add pie charts
-fig.add_trace(go.Pie(                   # Add pie plot using Plotly Graph Object
-     values=top_cases.TOTALCASES,       # y variable
-     labels=top_cases.COUNTRY,          # x variable
-     domain=dict(x=[0, 0.5]),           # Position on Domain
-     name="T_Cases"),                   # Tag
-     row=1, col=1)                      # Position on Plot
-
-fig.add_trace(go.Pie(
-     values=top_cases.DEATH_RATE,
-     labels=top_cases.COUNTRY,
-     domain=dict(x=[0.5, 1.0]),
-     name="Death Rate"),
-     row=1, col=2)
-     
-fig.add_trace(go.Pie(
-     values=top_cases.SURVIVAL_RATE,
-     labels=top_cases.COUNTRY,
-     domain=dict(x=[0, 0.5]),
-     name="Survival"), 
-     row=2, col=1)
-
-fig.add_trace(go.Pie(
-     values=top_cases.PERCENT_TESTS_POSITIVE,
-     labels=top_cases.COUNTRY,
-     domain=dict(x=[0.5, 1.0]),
-     name="Tests Pos"),
-     row=2, col=2)
-
-fig.add_trace(go.Pie(
-     values=top_cases.TOTALDEATHS,
-     labels=top_cases.COUNTRY,
-     domain=dict(x=[0.5, 1.0]),
-     name="T_Deaths"),
-     row=3, col=1)
-     
-fig.add_trace(go.Pie(
-     values=top_cases.TOTALRECOVERED,
-     labels=top_cases.COUNTRY,
-     domain=dict(x=[0, 0.5]),
-     name="T_Recovered"), 
-     row=3, col=2)
-
-fig.add_trace(go.Pie(
-     values=top_cases.ACTIVECASES,
-     labels=top_cases.COUNTRY,
-     domain=dict(x=[0.5, 1.0]),
-     name="Active"),
-     row=4, col=1)
-
-fig.add_trace(go.Pie(
-     values=top_cases.SERIOUS_CRITICAL,
-     labels=top_cases.COUNTRY,
-     domain=dict(x=[0.5, 1.0]),
-     name="Serious"),
-     row=4, col=2)
-
-fig.add_trace(go.Pie(
-     values=top_cases.DEATH_PER_1M,
-     labels=top_cases.COUNTRY,
-     domain=dict(x=[0.5, 1.0]),
-     name="DeathsPM"),
-     row=5, col=1)
-     
-fig.add_trace(go.Pie(
-     values=top_cases.TOTALTESTS,
-     labels=top_cases.COUNTRY,
-     domain=dict(x=[0, 0.5]),
-     name="T_Tests"), 
-     row=5, col=2)
-
-fig.add_trace(go.Pie(
-     values=top_cases.TESTS_PER_1M,
-     labels=top_cases.COUNTRY,
-     domain=dict(x=[0.5, 1.0]),
-     name="TestsPM"),
-     row=6, col=1)
-
-fig.add_trace(go.Pie(
-     values=top_cases.POPULATION,
-     labels=top_cases.COUNTRY,
-     domain=dict(x=[0, 0.5]),
-     name="Population"), 
-     row=6, col=2)
-
-fig.add_trace(go.Pie(
-     values=top_cases.POPULATION_DENSITY,
-     labels=top_cases.COUNTRY,
-     domain=dict(x=[0, 0.5]),
-     name="Population Density"), 
-     row=7, col=1)
+for i, (col, _, name) in enumerate(PIE_METRICS):
+    fig.add_trace(go.Pie(                   # Add pie plot using Plotly Graph Object
+         values=top_cases[col],             # y variable
+         labels=top_cases.COUNTRY,          # x variable
+         name=name),                        # Tag
+         row=i // 2 + 1, col=i % 2 + 1)     # Position on Plot
 
 # Update layout
 fig['layout'].update(
      height=3000, 
      width=900, 
-     title='<b>Top 10 Countries</b>' + ', ' + last_update, 
+     title=f'<b>Top 10 Countries</b>{SUFFIX}', 
      title_x= .5, 
      title_font_size = 15, 
      hovermode = "x unified")
 
-fig.show()
+if INTERACTIVE: fig.show()
 fig.write_image("images/pie.png")
 
 
@@ -1378,9 +942,14 @@ fig.write_image("images/pie.png")
 plt.figure(figsize=(20,8))
 
 # Numerical variables to be used in Pearson Correlation Heatmap
-pc = top_cases[['TOTALCASES', 'TOTALDEATHS','TOTALRECOVERED', 'ACTIVECASES', 'SERIOUS_CRITICAL',
-              'TOTCASES_PER_1M', 'DEATH_PER_1M', 'TOTALTESTS', 'TESTS_PER_1M',
-              'POPULATION', 'DEATH_RATE', 'SURVIVAL_RATE', 'PERCENT_TESTS_POSITIVE', 'GDP_PER_CAPITA', 'POPULATION_DENSITY']].corr()
+TOP_COLS = ['TOTALCASES', 'TOTALDEATHS','TOTALRECOVERED', 'ACTIVECASES', 'SERIOUS_CRITICAL',
+            'TOTCASES_PER_1M', 'DEATH_PER_1M', 'TOTALTESTS', 'TESTS_PER_1M',
+            'POPULATION', 'DEATH_RATE', 'SURVIVAL_RATE', 'PERCENT_TESTS_POSITIVE', 'GDP_PER_CAPITA', 'POPULATION_DENSITY']
+
+# Rows with a missing value (GDP or population density after the left merges) are dropped once, as in the world heatmap
+X = top_cases[TOP_COLS].to_numpy(dtype=np.float32, na_value=np.nan)
+X = X[~np.isnan(X).any(axis=1)]
+pc = pd.DataFrame(np.corrcoef(X, rowvar=False), index=TOP_COLS, columns=TOP_COLS)
 
 # Plot correlation using Seaborn
 sns.heatmap(pc, 
@@ -1390,7 +959,7 @@ sns.heatmap(pc,
             annot= True)
 
 # Set title
-plt.title(  "Top Countries Heatmap" + ', ' + last_update, size= 20, pad = 50)
+plt.title(  f"Top Countries Heatmap{SUFFIX}", size= 20, pad = 50)
 
 plt.savefig('images/toptenheat.png', facecolor='w')
 
@@ -1414,8 +983,19 @@ global_data.head()
 # In[62]:
 
 
+CONT_METRICS = [('TOTALCASES', 'Total Cases For Each Continent'), ('TOTALDEATHS', 'Total Deaths For Each Continent'),
+                ('TOTALRECOVERED', 'Total Recovered For Each Continent'), ('ACTIVECASES', 'Active Cases For Each Continent'),
+                ('SERIOUS_CRITICAL', 'Serious and Critical Cases For Each Continent'), ('TOTCASES_PER_1M', 'Total Cases Per Million For Each Continent'),
+                ('DEATH_PER_1M', 'Total Deaths Per Million For Each Continent'), ('TOTALTESTS', 'Total Tests For Each Continent'),
+                ('TESTS_PER_1M', 'Total Tests Per Million For Each Continent'), ('POPULATION', 'Population For Each Continent'),
+                ('DEATH_RATE', 'Death Rate For Each Continent'), ('SURVIVAL_RATE', 'Survival Rate For Each Continent'),
+                ('PERCENT_TESTS_POSITIVE', 'Percent of Tests Positive For Each Continent'), ('GDP_PER_CAPITA', 'GDP per capita')]
+
+# Group once: totals, means and standard errors per continent, shared by the bubble plot and the continent bar subplots
+by_continent = global_data.groupby('CONTINENT')[[col for col, _ in CONT_METRICS]].agg(['sum', 'mean', 'sem'])
+
 # Grouped Dataframe with Sorted Values
-global_confirmed = pd.DataFrame(global_data.groupby('CONTINENT')['TOTALCASES'].sum().sort_values(ascending = False))
+global_confirmed = by_continent[('TOTALCASES', 'sum')].sort_values(ascending = False).to_frame('TOTALCASES')
 
 fig1 = px.scatter(global_confirmed,                                                         # Create Plotly Express scatter figure
                 x = global_confirmed.index,                                                 # X variable
@@ -1423,12 +1003,12 @@ fig1 = px.scatter(global_confirmed,
                 size = 'TOTALCASES',                                                        # Bubble size based on value counts
                 size_max = 100,                                                             # Max bubble size
                 color = global_confirmed.index,                                             # Hue
-                title = '<b>Total Confirmed Cases by Continent</b>' + ', ' + last_update,       
+                title = f'<b>Total Confirmed Cases by Continent</b>{SUFFIX}',       
                 width=900, 
                 height= 600)
 
 fig1['layout'].update(title_x= .5, title_font_size = 15)                                                          # Title Position
-fig1.show()
+if INTERACTIVE: fig1.show()
 
 fig1.write_image('images/bubble.png')
 
@@ -1442,16 +1022,19 @@ fig1.write_image('images/bubble.png')
 # In[63]:
 
 
-fig = px.scatter(global_data,                                                                                                   # Create Plotly Express scatter figure
-                x="TESTS_PER_1M",                                                                                               # X variable
-                y="TOTCASES_PER_1M",                                                                                            # Y variable
+# Only the plotted columns, with their log10 computed once for both scatter plots (non-positive values are left out, as on a log axis)
+scatter_data = global_data[['COUNTRY', 'CONTINENT', 'TESTS_PER_1M', 'TOTCASES_PER_1M', 'POPULATION_DENSITY']].copy()
+for col in ['TESTS_PER_1M', 'TOTCASES_PER_1M', 'POPULATION_DENSITY']:
+    scatter_data['LOG_' + col] = np.log10(scatter_data[col].where(scatter_data[col] > 0).to_numpy(np.float32))
+
+fig = px.scatter(scatter_data,                                                                                                  # Create Plotly Express scatter figure
+                x="LOG_TESTS_PER_1M",                                                                                           # X variable (log10)
+                y="LOG_TOTCASES_PER_1M",                                                                                        # Y variable (log10)
                 color="CONTINENT",                                                                                              # Hue
                 trendline= False,                                                                                               # No Trendline
-                log_x = True,                                                                                                   # X axis log scale
-                log_y= True,                                                                                                    # Y axis log scale
-                title = '<b>Total confirmed COVID-19 cases per million vs Total tests per million</b>' + ', ' + last_update,    # Tit
-                labels=dict(TESTS_PER_1M="Tests Per Million", TOTCASES_PER_1M="Total Confirmed Cases Per Million"),             # Hover labels 
-                custom_data=["COUNTRY"])
+                title = f'<b>Total confirmed COVID-19 cases per million vs Total tests per million</b>{SUFFIX}',    # Tit
+                labels=dict(LOG_TESTS_PER_1M="Tests Per Million (log10)", LOG_TOTCASES_PER_1M="Total Confirmed Cases Per Million (log10)"),  # Axis labels 
+                custom_data=["COUNTRY", "TESTS_PER_1M", "TOTCASES_PER_1M"])
 
 fig.update_layout(  width=900, 
                     height=600, 
@@ -1467,12 +1050,12 @@ xaxis={'tickformat':'e', 'rangemode': 'tozero',     # Format X ticks
 
 fig.update_traces(                                  # Update fig scatter plot
         hovertemplate="<br>".join([                 # Assign labels to hover box from variables in fig
-        "TESTS PER MILLION: %{x}",                  # Customize name of X data 
-        "TOTAL CASES PER MILLION: %{y}",            # Customuze name of Y data
+        "TESTS PER MILLION: %{customdata[1]}",      # Customize name of X data (unlogged value)
+        "TOTAL CASES PER MILLION: %{customdata[2]}",# Customuze name of Y data
         "COUNTRY: %{customdata[0]}"                 # Assign to position 0 of custom_data
     ])
 )
-fig.show()
+if INTERACTIVE: fig.show()
 
 fig.write_image('images/totaltestscatter.png')
 
@@ -1480,16 +1063,14 @@ fig.write_image('images/totaltestscatter.png')
 # In[64]:
 
 
-fig = px.scatter(global_data, 
-                x="POPULATION_DENSITY", 
-                y="TOTCASES_PER_1M", 
+fig = px.scatter(scatter_data, 
+                x="LOG_POPULATION_DENSITY", 
+                y="LOG_TOTCASES_PER_1M", 
                 color="CONTINENT", 
                 trendline= False, 
-                log_x = True, 
-                log_y= True, 
-                title = '<b>Total confirmed COVID-19 cases per million vs Population Density</b>' + ', ' + last_update, 
-                labels=dict(POPULATION_DENSITY="Population Density", TOTCASES_PER_1M="Total Confirmed Cases Per Million"), 
-                custom_data=["COUNTRY"])
+                title = f'<b>Total confirmed COVID-19 cases per million vs Population Density</b>{SUFFIX}', 
+                labels=dict(LOG_POPULATION_DENSITY="Population Density (log10)", LOG_TOTCASES_PER_1M="Total Confirmed Cases Per Million (log10)"), 
+                custom_data=["COUNTRY", "POPULATION_DENSITY", "TOTCASES_PER_1M"])
 
 fig.update_layout(  width=900, 
                     height=600, 
@@ -1505,13 +1086,13 @@ xaxis={'tickformat':'e', 'rangemode': 'tozero',
 
 fig.update_traces(
         hovertemplate="<br>".join([
-        "POPULATION DENSITY: %{x}",
-        "TOTAL CASES PER MILLION: %{y}",
+        "POPULATION DENSITY: %{customdata[1]}",
+        "TOTAL CASES PER MILLION: %{customdata[2]}",
         "COUNTRY: %{customdata[0]}"
     ])
 )
 
-fig.show()
+if INTERACTIVE: fig.show()
 
 fig.write_image('images/popdenscatter.png')
 
@@ -1521,63 +1102,22 @@ fig.write_image('images/popdenscatter.png')
 # In[65]:
 
 
-fig2, axes = plt.subplots(8, 2, figsize= (25,25) )
-
-axes1 = sns.barplot(global_data["CONTINENT"], global_data["TOTALCASES"], data= global_data, ax = axes[0,0])
-axes1.set_title("Total Cases For Each Continent", fontsize=15)
-
-axes2 = sns.barplot(global_data["CONTINENT"], global_data["TOTALDEATHS"], data= global_data, ax = axes[0,1])
-axes2.set_title("Total Deaths For Each Continent", fontsize=15)
-
-axes3 = sns.barplot(global_data["CONTINENT"], global_data["TOTALRECOVERED"], data= global_data, ax = axes[1,0])
-axes3.set_title("Total Recovered For Each Continent", fontsize=15)
-
-axes4 = sns.barplot(global_data["CONTINENT"], global_data["ACTIVECASES"], data= global_data, ax = axes[1,1])
-axes4.set_title("Active Cases For Each Continent", fontsize=15)
-
-axes5 = sns.barplot(global_data["CONTINENT"], global_data["SERIOUS_CRITICAL"], data= global_data, ax = axes[2,0])
-axes5.set_title("Serious and Critical Cases For Each Continent", fontsize=15)
-
-axes6 = sns.barplot(global_data["CONTINENT"], global_data["TOTCASES_PER_1M"], data= global_data, ax = axes[2,1])
-axes6.set_title("Total Cases Per Million For Each Continent", fontsize=15)
-
-axes7 = sns.barplot(global_data["CONTINENT"], global_data["DEATH_PER_1M"], data= global_data, ax = axes[3,0])
-axes7.set_title("Total Deaths Per Million For Each Continent", fontsize=15)
-
-axes8 = sns.barplot(global_data["CONTINENT"], global_data["TOTALTESTS"], data= global_data, ax = axes[3,1])
-axes8.set_title("Total Tests For Each Continent", fontsize=15)
+# Bar heights and error bars come from the by_continent groupby above
+top_density = top_cases.groupby('CONTINENT')['POPULATION_DENSITY'].agg(['mean', 'sem'])
 
-axes9 = sns.barplot(global_data["CONTINENT"], global_data["TESTS_PER_1M"], data= global_data, ax = axes[4,0])
-axes9.set_title("Total Tests Per Million For Each Continent", fontsize=15)
+panels = [(by_continent[col], title) for col, title in CONT_METRICS] + [(top_density, 'Population Density')]
 
-axes10 = sns.barplot(global_data["CONTINENT"], global_data["POPULATION"], data= global_data, ax = axes[4,1])
-axes10.set_title("Population For Each Continent", fontsize=15)
-
-axes11 = sns.barplot(global_data["CONTINENT"], global_data["DEATH_RATE"], data= global_data, ax = axes[5,0])
-axes11.set_title("Death Rate For Each Continent", fontsize=15)
-
-axes12 = sns.barplot(global_data["CONTINENT"], global_data["SURVIVAL_RATE"], data= global_data, ax = axes[5,1])
-axes12.set_title("Survival Rate For Each Continent", fontsize=15)
-
-axes13 = sns.barplot(global_data["CONTINENT"], global_data["PERCENT_TESTS_POSITIVE"], data= global_data, ax = axes[6,0])
-axes13.set_title("Percent of Tests Positive For Each Continent", fontsize=15)
-
-axes14 = sns.barplot(global_data["CONTINENT"], global_data["GDP_PER_CAPITA"], data= global_data, ax = axes[6,1])
-axes14.set_title("GDP per capita", fontsize=15)
-
-axes15 = sns.barplot(top_cases["CONTINENT"], top_cases["POPULATION_DENSITY"], data= top_cases, ax= axes[7,0])
-axes15.set_title("Population Density", fontsize=15)
-
-axes16 = sns.barplot(top_cases["CONTINENT"], top_cases["POPULATION_DENSITY"], data= top_cases, ax= axes[7,1])
-axes16.set_title("Population Density", fontsize=15)
+fig2, axes = plt.subplots(8, 2, figsize= (25,25) )
 
-fig2.delaxes(ax = axes16)
+for ax, (stat, title) in zip(axes.flat, panels):
+    ax.bar(stat.index, stat['mean'], yerr=1.96 * stat['sem'], ecolor='.26',                # Mean with a ~95% confidence interval, like sns.barplot
+           color=sns.color_palette(n_colors=len(stat)))
+    ax.set_title(title, fontsize=15)
+    ax.ticklabel_format(axis='y', style = 'plain')
 
-for axes in axes.flat:
-    axes.ticklabel_format(axis='y', style = 'plain')
-    axes.set_xticklabels(axes.get_xticklabels())
+fig2.delaxes(ax = axes[7,1])
 
-fig2.suptitle('CONTINENTS BAR PLOTS' + ', ' + last_update, fontsize = 30)
+fig2.suptitle(f'CONTINENTS BAR PLOTS{SUFFIX}', fontsize = 30)
 fig2.tight_layout(pad=0.6, w_pad=0.5, h_pad=3)
 fig2.subplots_adjust(top=.92)
 
@@ -1602,9 +1142,15 @@ us_data.columns
 #Correlation Between Total Tests and Total Cases
 plt.figure(figsize=(20,8))
 
-pc = us_data[['TOTALCASES', 'TOTALDEATHS','TOTALRECOVERED', 'ACTIVECASES',
+US_COLS = ['TOTALCASES', 'TOTALDEATHS','TOTALRECOVERED', 'ACTIVECASES',
        'TOTCASES_PER_1M', 'DEATH_PER_1M', 'TOTALTESTS', 'TESTS_PER_1M',
-       'POPULATION', 'DEATH_RATE', 'SURVIVAL_RATE', 'PERCENT_TESTS_POSITIVE']].corr()
+       'POPULATION', 'DEATH_RATE', 'SURVIVAL_RATE', 'PERCENT_TESTS_POSITIVE']
+
+# float32 copy of the numeric columns for plotting, us_data itself keeps full precision for export
+num_cols = us_data.select_dtypes('number').columns
+us_num = pd.DataFrame(us_data[num_cols].to_numpy(dtype=np.float32, na_value=np.nan), columns=num_cols)
+
+pc = pd.DataFrame(np.corrcoef(us_num[US_COLS].to_numpy(), rowvar=False), index=US_COLS, columns=US_COLS)
 
 sns.heatmap(  pc, 
               cmap="Spectral",            # Color scheme
@@ -1612,7 +1158,7 @@ sns.heatmap(  pc,
               cbar_kws={"shrink": .8},    # Bar width
               annot= True)                # Include correlation value
 
-plt.title("US Data Heatmap" + ', ' + last_update, size= 20, pad = 50)
+plt.title(f"US Data Heatmap{SUFFIX}", size= 20, pad = 50)
 
 plt.savefig('images/usheat.png', facecolor='w')
 
@@ -1621,14 +1167,17 @@ plt.savefig('images/usheat.png', facecolor='w')
 # 
 # ---
 # 
-# Pairplot is a module of `Seaborn` library which provides a high-level interface for drawing attractive and informative statistical graphics. A pairplot provides a veiw of bivariate relationships in a dataset. The pairplot function creates a grid of Axes such that each variable in the data will by shared in the y-axis across a single row and in the x-axis across a single column. 
+# Pairplot is a module of `Seaborn` library which provides a high-level interface for drawing attractive and informative statistical graphics. A pairplot provides a veiw of bivariate relationships in a dataset. The pairplot function creates a grid of Axes such that each variable in the data will by shared in the y-axis across a single row and in the x-axis across a single column. Only the lower triangle of the grid is drawn with `PairGrid(corner=True)`, since the upper triangle repeats the same scatter plots mirrored. 
 
 # In[68]:
 
 
-sns_plot = sns.pairplot(us_data)
+# Lower triangle only, over the heatmap's columns (the upper triangle mirrors it)
+sns_plot = sns.PairGrid(us_num[US_COLS], corner=True, diag_sharey=False)
+sns_plot.map_lower(sns.scatterplot, s=4, linewidth=0, rasterized=True)        # Small rasterized markers keep the grid light
+sns_plot.map_diag(sns.histplot, kde=False)
 sns_plot.fig.suptitle("Global Data Pair Plot")
-sns_plot.savefig('images/pair.png', facecolor='w')
+sns_plot.savefig('images/pair.png', facecolor='w', dpi=100)
 
 
 # ---
@@ -1663,7 +1212,11 @@ sns_plot.savefig('images/pair.png', facecolor='w')
 #Pearson correlation heatmap
 plt.figure(figsize=(20,8))
 
-pc = global_data[['TOTALCASES', 'TOTALDEATHS','TOTALRECOVERED', 'ACTIVECASES', 'SERIOUS_CRITICAL','TOTCASES_PER_1M', 'DEATH_PER_1M', 'TOTALTESTS', 'TESTS_PER_1M','POPULATION', 'DEATH_RATE', 'SURVIVAL_RATE', 'PERCENT_TESTS_POSITIVE', 'GDP_PER_CAPITA', 'POPULATION_DENSITY']].corr()
+WORLD_COLS = ['TOTALCASES', 'TOTALDEATHS','TOTALRECOVERED', 'ACTIVECASES', 'SERIOUS_CRITICAL','TOTCASES_PER_1M', 'DEATH_PER_1M', 'TOTALTESTS', 'TESTS_PER_1M','POPULATION', 'DEATH_RATE', 'SURVIVAL_RATE', 'PERCENT_TESTS_POSITIVE', 'GDP_PER_CAPITA', 'POPULATION_DENSITY']
+
+arr = global_data[WORLD_COLS].to_numpy(dtype=np.float64)
+arr = arr[~np.isnan(arr).any(axis=1)]                                           # Drop rows with missing values once
+pc = pd.DataFrame(np.corrcoef(arr, rowvar=False), index=WORLD_COLS, columns=WORLD_COLS)
 
 sns.heatmap(pc, 
             cmap="rainbow_r", 
@@ -1742,6 +1295,46 @@ global_data.describe()
 # - **Prob (JB)**: Jarque-Bera statistic as a probability
 # 
 # - **Cond. No.**: Test for multicollinearity
+# 
+# All six models share the same predictor, `GDP_PER_CAPITA`, so rows with missing values are dropped once and the coefficients for every response, with and without a constant, are solved together with `np.linalg.lstsq`. `statsmodels` is then only used to produce each summary report from the already cleaned design matrices.
+
+# In[ ]:
+
+
+# Shared inputs for all six regressions: one NaN mask, one design matrix with and without a constant
+OLS_RESPONSES = ['TOTCASES_PER_1M', 'DEATH_PER_1M', 'TESTS_PER_1M']
+
+x = global_data['GDP_PER_CAPITA'].to_numpy(dtype=np.float64)
+Y = global_data[OLS_RESPONSES].to_numpy(dtype=np.float64)
+mask = np.isfinite(x) & np.isfinite(Y).all(axis=1)
+
+X_noconst = pd.DataFrame({'GDP_PER_CAPITA': x[mask]})                     # Independent var
+X_const = sm.add_constant(X_noconst)                                     # intercept (beta_0) added to model
+Y_ols = pd.DataFrame(Y[mask], columns=OLS_RESPONSES)                     # Dependant variables
+
+# Closed-form coefficients for every response at once
+beta_noconst, *_ = np.linalg.lstsq(X_noconst.to_numpy(), Y_ols.to_numpy(), rcond=None)
+beta_const, *_ = np.linalg.lstsq(X_const.to_numpy(), Y_ols.to_numpy(), rcond=None)
+
+# One figure outside pyplot's registry is reused to write every summary report as a PNG
+summary_fig = Figure(figsize=(7, 5))
+summary_ax = summary_fig.add_subplot(111)
+
+def ols_line(response):
+    # End points of the fitted 'response ~ GDP_PER_CAPITA' line, as (response, GDP) for the scatter plots below
+    b0, b1 = beta_const[:, OLS_RESPONSES.index(response)]
+    gdp = np.array([X_noconst['GDP_PER_CAPITA'].min(), X_noconst['GDP_PER_CAPITA'].max()])
+    return b0 + b1 * gdp, gdp
+
+def render_summary(summary, path):
+    summary_ax.clear()
+    summary_ax.axis('off')
+    summary_ax.text(0.01, 0.05, str(summary), fontsize=10, fontproperties='monospace')
+    summary_fig.tight_layout()
+    summary_fig.savefig(path, facecolor='w')
+
+pd.DataFrame(np.vstack([beta_noconst, beta_const]), 
+             index=['GDP_PER_CAPITA (no constant)', 'const', 'GDP_PER_CAPITA'], columns=OLS_RESPONSES)
 
 # ### Total Cases per Million vs GDP
 # 
@@ -1752,19 +1345,11 @@ global_data.describe()
 # In[71]:
 
 
-X = global_data[['GDP_PER_CAPITA']]             # Independent vars
-y = global_data['TOTCASES_PER_1M']              # Dependant variable
+model = sm.OLS(Y_ols['TOTCASES_PER_1M'], X_noconst).fit()     # Line of best fit
+summary = model.summary()                                     # Build the report once
 
-model = sm.OLS(y,X, missing = 'drop').fit()     # Line of best fit
-predictions = model.predict(X)                  # Prediction
-
-model.summary()
-
-plt.rc('figure', figsize=(7, 5))
-plt.text(0.01, 0.05, str(model.summary()), {'fontsize': 10}, fontproperties = 'monospace') # approach improved by OP -> monospace!
-plt.axis('off')
-plt.tight_layout()
-plt.savefig('images/output1.png')
+render_summary(summary, 'images/output1.png')                 # Write report to png
+summary                                                       # Display report
 
 
 # In[ ]:
@@ -1778,20 +1363,11 @@ plt.savefig('images/output1.png')
 # In[72]:
 
 
-X = global_data['GDP_PER_CAPITA']
-y = global_data['TOTCASES_PER_1M']
-X = sm.add_constant(X) # intercept (beta_0) added to model
-
-model = sm.OLS(y,X, missing='drop').fit()
-predictions = model.predict(X)
-
-model.summary()
+model = sm.OLS(Y_ols['TOTCASES_PER_1M'], X_const).fit()
+summary = model.summary()
 
-plt.rc('figure', figsize=(7, 5))
-plt.text(0.01, 0.05, str(model.summary()), {'fontsize': 10}, fontproperties = 'monospace') # approach improved by OP -> monospace!
-plt.axis('off')
-plt.tight_layout()
-plt.savefig('images/output2.png')
+render_summary(summary, 'images/output2.png')
+summary
 
 
 # In[73]:
@@ -1800,10 +1376,9 @@ plt.savefig('images/output2.png')
 fig =   px.scatter(global_data, 
         y="GDP_PER_CAPITA", 
         x="TOTCASES_PER_1M",  
-        trendline= "ols", 
         log_x = False, 
         log_y= False, 
-        title = '<b>COVID-19 Total cases per million vs GDP per capita</b>' + ', ' + last_update, 
+        title = f'<b>COVID-19 Total cases per million vs GDP per capita</b>{SUFFIX}', 
         labels=dict(GDP_PER_CAPITA="GDP Per Capita", TOTCASES_PER_1M="Total Cases Per Million"), 
         custom_data=["COUNTRY"])
 
@@ -1827,7 +1402,11 @@ fig.update_traces(
     ])
 )
 
-fig.show()
+# Fitted line from the regression above (with constant) instead of refitting inside plotly
+xs, ys = ols_line('TOTCASES_PER_1M')
+fig.add_scatter(x=xs, y=ys, mode='lines', name='OLS', hoverinfo='skip')
+
+if INTERACTIVE: fig.show()
 
 fig.write_image('images/gdpscatter.png')
 
@@ -1842,19 +1421,11 @@ fig.write_image('images/gdpscatter.png')
 # In[74]:
 
 
-X = global_data[['GDP_PER_CAPITA']] 
-y = global_data['DEATH_PER_1M'] 
-
-model = sm.OLS(y,X, missing='drop').fit()
-predictions = model.predict(X)
-
-model.summary()
+model = sm.OLS(Y_ols['DEATH_PER_1M'], X_noconst).fit()
+summary = model.summary()
 
-plt.rc('figure', figsize=(7, 5))
-plt.text(0.01, 0.05, str(model.summary()), {'fontsize': 10}, fontproperties = 'monospace') # approach improved by OP -> monospace!
-plt.axis('off')
-plt.tight_layout()
-plt.savefig('images/output3.png')
+render_summary(summary, 'images/output3.png')
+summary
 
 
 # #### Deaths Per Million With Constant
@@ -1862,20 +1433,11 @@ plt.savefig('images/output3.png')
 # In[75]:
 
 
-X = global_data[['GDP_PER_CAPITA']]
-y = global_data['DEATH_PER_1M']
-X = sm.add_constant(X)
-
-model = sm.OLS(y,X, missing='drop').fit()
-predictions = model.predict(X)
-
-model.summary()
+model = sm.OLS(Y_ols['DEATH_PER_1M'], X_const).fit()
+summary = model.summary()
 
-plt.rc('figure', figsize=(7, 5))
-plt.text(0.01, 0.05, str(model.summary()), {'fontsize': 10}, fontproperties = 'monospace') # approach improved by OP -> monospace!
-plt.axis('off')
-plt.tight_layout()
-plt.savefig('images/output4.png')
+render_summary(summary, 'images/output4.png')
+summary
 
 
 # In[76]:
@@ -1885,10 +1447,9 @@ plt.savefig('images/output4.png')
 fig =   px.scatter(global_data, 
         y="GDP_PER_CAPITA", 
         x="DEATH_PER_1M", 
-        trendline= "ols", 
         log_x = False, 
         log_y= False, 
-        title = '<b>Total confirmed COVID-19 deaths per million vs GDP per capita</b>' + ', ' + last_update, 
+        title = f'<b>Total confirmed COVID-19 deaths per million vs GDP per capita</b>{SUFFIX}', 
         labels=dict(GDP_PER_CAPITA="GDP Per Capita", DEATH_PER_1M="Deaths Per Million"), 
         custom_data=["COUNTRY", "CONTINENT"])
 
@@ -1912,7 +1473,11 @@ fig.update_traces(
     ])
 )
 
-fig.show()
+# Fitted line from the regression above (with constant) instead of refitting inside plotly
+xs, ys = ols_line('DEATH_PER_1M')
+fig.add_scatter(x=xs, y=ys, mode='lines', name='OLS', hoverinfo='skip')
+
+if INTERACTIVE: fig.show()
 
 fig.write_image('images/gdpdeathscatter.png')
 
@@ -1926,19 +1491,11 @@ fig.write_image('images/gdpdeathscatter.png')
 # In[77]:
 
 
-X = global_data[['GDP_PER_CAPITA']] #independent vars
-y = global_data['TESTS_PER_1M'] #dependant variable
-
-model = sm.OLS(y,X, missing='drop').fit()
-predictions = model.predict(X)
+model = sm.OLS(Y_ols['TESTS_PER_1M'], X_noconst).fit()
+summary = model.summary()
 
-model.summary()
-
-plt.rc('figure', figsize=(7, 5))
-plt.text(0.01, 0.05, str(model.summary()), {'fontsize': 10}, fontproperties = 'monospace') # approach improved by OP -> monospace!
-plt.axis('off')
-plt.tight_layout()
-plt.savefig('images/output5.png')
+render_summary(summary, 'images/output5.png')
+summary
 
 
 # #### Tests Per Million With Constant
@@ -1946,20 +1503,11 @@ plt.savefig('images/output5.png')
 # In[78]:
 
 
-X = global_data[['GDP_PER_CAPITA']] #independent vars
-y = global_data['TESTS_PER_1M'] #dependant variable
-X = sm.add_constant(X) # intercept (beta_0) added to model
-
-model = sm.OLS(y,X, missing='drop').fit()
-predictions = model.predict(X)
+model = sm.OLS(Y_ols['TESTS_PER_1M'], X_const).fit()
+summary = model.summary()
 
-model.summary()
-
-plt.rc('figure', figsize=(7, 5))
-plt.text(0.01, 0.05, str(model.summary()), {'fontsize': 10}, fontproperties = 'monospace') # approach improved by OP -> monospace!
-plt.axis('off')
-plt.tight_layout()
-plt.savefig('images/output6.png')
+render_summary(summary, 'images/output6.png')
+summary
 
 
 # In[79]:
@@ -1968,10 +1516,9 @@ plt.savefig('images/output6.png')
 fig = px.scatter(global_data, 
                 y="GDP_PER_CAPITA", 
                 x="TESTS_PER_1M",  
-                trendline= "ols", 
                 log_x = False, 
                 log_y= False, 
-                title = '<b>Total COVID-19 Tests administed per million vs GDP per capita</b>' + ', ' + last_update, 
+                title = f'<b>Total COVID-19 Tests administed per million vs GDP per capita</b>{SUFFIX}', 
                 labels=dict(GDP_PER_CAPITA="GDP Per Capita", TESTS_PER_1M="Tests Per Million"), 
                 custom_data=["COUNTRY", "CONTINENT"])
 
@@ -1994,7 +1541,12 @@ fig.update_traces(
         "COUNTRY: %{customdata[0]}"
     ])
 )
-fig.show()
+
+# Fitted line from the regression above (with constant) instead of refitting inside plotly
+xs, ys = ols_line('TESTS_PER_1M')
+fig.add_scatter(x=xs, y=ys, mode='lines', name='OLS', hoverinfo='skip')
+
+if INTERACTIVE: fig.show()
 
 fig.write_image('images/gdptestscatter.png')
 
@@ -2013,7 +1565,7 @@ fig.write_image('images/gdptestscatter.png')
 # The geospatial data used will consist of shapefiles. A shapefile is a simple, nontopological format for storing the geometric location and attribute information of geographic features. Geographic features in a shapefile can be represented by points, lines, or polygons. Latitude and longitute coordinates will be added to the dataframe using `Nominatim` to gather data from OpenStreetMap
 # 
 # 
-# Geodata will be gathered from two different shapefiles. Each one contains country data that is missing in the other. The `df.update` function will be used to modify in place using non-NA values from a dataframe created from `global_data` merged with the dataframe containing the shapefiles.
+# Geodata will be gathered from two different shapefiles. Each one contains country data that is missing in the other. Their geometries will be coalesced into one geometry per country with `combine_first`, so `global_data` only has to be joined with the shapefile data once. Countries still missing after that are filled in from smaller individual shapefiles.
 
 # ### World Geospatial Data
 # 
@@ -2030,28 +1582,43 @@ global_data.head()
 # In[81]:
 
 
-# Use Nominatim to get Longitude and Latitude
+# Use Nominatim to get Longitude and Latitude (one geocoder for countries and states)
 locator = Nominatim(user_agent="myGeocoder")
+geocode = RateLimiter(locator.geocode, min_delay_seconds=1)             # Nominatim usage policy allows one request per second
+
+def geocode_one(name):
+    location = geocode(name)                                            # Find location data for one country or state
+    return (location.latitude, location.longitude) if location else (np.nan, np.nan)
+
+def cached_geocode(names, cache='geo_cache.csv'):
+    # Coordinates found on earlier runs are read from disk, only new names go to Nominatim
+    try:
+        df = pd.read_csv(cache, dtype={'NAME': 'string'})
+    except FileNotFoundError:
+        df = pd.DataFrame(columns=['NAME', 'LAT', 'LONG'])
+    known = set(df.NAME)
+    missing = [n for n in dict.fromkeys(names) if n not in known]
+    if missing:
+        found = pd.DataFrame([geocode_one(n) for n in missing], columns=['LAT', 'LONG']).assign(NAME=missing)
+        df = pd.concat([df, found.dropna()], ignore_index=True)         # Names that were not found are retried next run
+        df.to_csv(cache, columns=['NAME', 'LAT', 'LONG'], index=False)
+    return df.set_index('NAME').reindex(list(names))[['LAT', 'LONG']].to_numpy(dtype=np.float64)
 
-loc1_df=[]                                                              # Create empty array
-for i in global_data.COUNTRY:                                           # Iterate through COUNTRY column 
-        location = locator.geocode([i])                                 # Find location data for each country
-        loc1_df.append([location.latitude, location.longitude])         # Append location and longitude as tuples in dataframe
+country_locs = cached_geocode(global_data.COUNTRY)                      # (latitude, longitude) for each country, in row order
 
 
 # In[82]:
 
 
-global_loc = pd.DataFrame(loc1_df, columns = ['LAT', 'LONG'])           # Create dataframe with latitude and longitude information
+global_data['LAT'], global_data['LONG'] = country_locs.T                # Float columns straight from the coordinate array
 
-dfi.export(global_loc, 'images/globalloc.png', max_rows=10)
-global_loc.head()
+export_table(global_data[['LAT', 'LONG']], 'images/globalloc.png', max_rows=10)
+global_data[['LAT', 'LONG']].head()
 
 
 # In[83]:
 
 
-global_data = global_data.join(global_loc)      # Join 'global_loc' dataframe with 'global_data'
 global_data.head()
 
 
@@ -2060,31 +1627,42 @@ global_data.head()
 # In[84]:
 
 
-# Copy relative path of .shp file
-shapefile = 'Resources\\UIA_World_Countries_Boundaries-shp\World_Countries__Generalized_.shp'
-
-# Read shapefile using Geopandas
-gdf = gpd.read_file(shapefile)
+def read_shapes(shapefile, name_col=None):
+    if name_col is None:                                                # Keep every attribute field
+        return gpd.read_file(shapefile)
+    # Only the name field and the geometry are parsed, fiona skips every other attribute
+    with fiona.open(shapefile) as src:
+        fields = list(src.schema['properties'])
+    shp = gpd.read_file(shapefile, ignore_fields=[f for f in fields if f != name_col])
+    return shp[[name_col, 'geometry']].rename(columns={name_col: 'COUNTRY'})
+
+# Relative path of each .shp file and the field holding its name
+SHAPEFILES = {
+    'world1': ('Resources\\UIA_World_Countries_Boundaries-shp\World_Countries__Generalized_.shp', 'COUNTRY'),
+    'world2': ('Resources\Longitude_Graticules_and_World_Countries_Boundaries-shp\99bfd9e7-bb42-4728-87b5-07f8c8ac631c2020328-1-1vef4ev.lu5nk.shp', 'CNTRY_NAME'),
+    'hk':     ('Resources\HK-shp\gadm36_HKG_0.shp', 'NAME_0'),
+    'cn':     ('Resources\CarNetherlands-shp\BES_adm0.shp', 'NAME_0'),
+    'ch':     ('Resources\Channel-shp\cinms_py.shp', 'AREA_NAME'),
+    'macao':  ('Resources\Macao-shp\MAC_adm0.shp', 'NAME_ENGLI'),
+    'us':     ('Resources\stateshapes\cb_2018_us_state_500k.shp', None),
+    'dc':     ('Resources\Washington_DC_Boundary\Washington_DC_Boundary.shp', None)}
+
+# Read all shapefiles at once, GDAL does the file I/O outside the GIL
+with ThreadPoolExecutor(max_workers=4) as ex:
+    shapes = dict(zip(SHAPEFILES, ex.map(lambda args: read_shapes(*args), SHAPEFILES.values())))
 
 # Create dataframe to be merged later
-gdf1=gdf[['COUNTRY','geometry']].copy()
+gdf1 = norm_country(shapes['world1'])
 gdf1.head()
 
 
 # In[85]:
 
 
-# Copy relative path of .shp file
-shapefile = 'Resources\Longitude_Graticules_and_World_Countries_Boundaries-shp\99bfd9e7-bb42-4728-87b5-07f8c8ac631c2020328-1-1vef4ev.lu5nk.shp'
-
-# Read shapefile using Geopandas
-gdf2 = gpd.read_file(shapefile)
-gdf2= gdf2.rename(columns={'CNTRY_NAME': 'COUNTRY'})
-
 # Create dataframe to be merged later
-gdf3 = gdf2[['COUNTRY','geometry']].copy()
+gdf3 = norm_country(shapes['world2'])
 
-dfi.export(gdf3, 'images/globalshape2.png', max_rows=10)
+export_table(gdf3, 'images/globalshape2.png', max_rows=10)
 gdf3.head()
 
 
@@ -2092,23 +1670,26 @@ gdf3.head()
 
 
 # The Country names in the 'gdf1' dataframe are inconsistent with those in 'global_data'
-gdf1.COUNTRY= gdf1.COUNTRY.replace("Russian Federation","Russia")
-gdf1.COUNTRY= gdf1.COUNTRY.replace("Palestinian Territory","Palestine")
-gdf1.COUNTRY= gdf1.COUNTRY.replace("Czech Republic","Czechia")
-gdf1.COUNTRY= gdf1.COUNTRY.replace("United Arab Emirates","UAE")
-gdf1.COUNTRY= gdf1.COUNTRY.replace("South Korea","S. Korea")
-gdf1.COUNTRY= gdf1.COUNTRY.replace("Côte d'Ivoire","Ivory Coast")
-gdf1.COUNTRY= gdf1.COUNTRY.replace("Congo DRC","DRC")
-gdf1.COUNTRY= gdf1.COUNTRY.replace("Central African Republic","CAR")
-gdf1.COUNTRY= gdf1.COUNTRY.replace("Turks and Caicos Islands","Turks and Caicos")
-gdf1.COUNTRY= gdf1.COUNTRY.replace("Saint Vincent and the Grenadines","St. Vincent Grenadines")
-gdf1.COUNTRY= gdf1.COUNTRY.replace("Saint Barthelemy","St. Barth")
-gdf1.COUNTRY= gdf1.COUNTRY.replace("Brunei Darussalam","Brunei")
-gdf1.COUNTRY= gdf1.COUNTRY.replace("Saint Pierre and Miquelon","Saint Pierre Miquelon")
-gdf1.COUNTRY= gdf1.COUNTRY.replace("Curacao","Curaçao")
-gdf1.COUNTRY= gdf1.COUNTRY.replace("Faroe Islands","Faeroe Islands")
-
-dfi.export(gdf1, 'images/globalshape1.png', max_rows=10)
+GDF_RENAME = {
+    "Russian Federation":               "Russia",
+    "Palestinian Territory":            "Palestine",
+    "Czech Republic":                   "Czechia",
+    "United Arab Emirates":             "UAE",
+    "South Korea":                      "S. Korea",
+    "Côte d'Ivoire":                    "Ivory Coast",
+    "Congo DRC":                        "DRC",
+    "Central African Republic":         "CAR",
+    "Turks and Caicos Islands":         "Turks and Caicos",
+    "Saint Vincent and the Grenadines": "St. Vincent Grenadines",
+    "Saint Barthelemy":                 "St. Barth",
+    "Brunei Darussalam":                "Brunei",
+    "Saint Pierre and Miquelon":        "Saint Pierre Miquelon",
+    "Curacao":                          "Curaçao",
+    "Faroe Islands":                    "Faeroe Islands"}
+
+gdf1.COUNTRY= gdf1.COUNTRY.replace(GDF_RENAME)                          # Rename all countries in one pass
+
+export_table(gdf1, 'images/globalshape1.png', max_rows=10)
 
 
 # #### Merge DataFrames
@@ -2116,22 +1697,12 @@ dfi.export(gdf1, 'images/globalshape1.png', max_rows=10)
 # In[87]:
 
 
-# Set Country to String
-gdf1['COUNTRY'] =pd.Series(gdf1['COUNTRY'], dtype= "string")
-gdf2['COUNTRY'] =pd.Series(gdf2['COUNTRY'], dtype= "string")
-
-# Strip Country columns
-gdf1.COUNTRY = gdf1.COUNTRY.str.strip()
-gdf3.COUNTRY = gdf3.COUNTRY.str.strip()
-global_data.COUNTRY =global_data.COUNTRY.str.strip()
+# 'COUNTRY' is already a stripped string in 'global_data', 'gdf1' and 'gdf3'
+# Coalesce both shapefiles into one geometry per country ('gdf3' takes precedence), then join once
+geom = (gdf3.drop_duplicates('COUNTRY').set_index('COUNTRY')['geometry']
+        .combine_first(gdf1.drop_duplicates('COUNTRY').set_index('COUNTRY')['geometry']))
 
-# Create new
-geo_global_data = global_data.merge(gdf1, on='COUNTRY', how='left')
-geo_global_data['COUNTRY'] =pd.Series(geo_global_data['COUNTRY'], dtype= "string")
-geo_global_data2 = global_data.merge(gdf3, on='COUNTRY', how= 'left')
-
-
-geo_global_data.update(geo_global_data2)
+geo_global_data = global_data.join(geom, on='COUNTRY')
 
 # Check datatypes
 geo_global_data.dtypes
@@ -2152,7 +1723,7 @@ type(geo_global_data)
 # In[89]:
 
 
-geo_global_data[geo_global_data.isna().any(axis=1)]
+geo_global_data.loc[geo_global_data.isna().to_numpy().any(axis=1)]
 
 
 # #### Hong Kong Shapefile
@@ -2160,13 +1731,7 @@ geo_global_data[geo_global_data.isna().any(axis=1)]
 # In[90]:
 
 
-# Copy relative path of .shp file
-shapefile = 'Resources\HK-shp\gadm36_HKG_0.shp'                       # Relative path to shapefile
-
-# Read shapefile using Geopandas
-hk_shp = gpd.read_file(shapefile)                           # Create Hong Kong dataframe
-hk_shp= hk_shp.rename(columns={'NAME_0': 'COUNTRY'})        # Rename column
-hk_shp.drop(['GID_0'], axis = 1, inplace= True)             # Drop column
+hk_shp = shapes['hk']                                       # Hong Kong dataframe with name as 'COUNTRY'
 hk_shp
 
 
@@ -2175,13 +1740,7 @@ hk_shp
 # In[91]:
 
 
-# Copy relative path of .shp file
-shapefile = 'Resources\CarNetherlands-shp\BES_adm0.shp'
-
-# Read shapefile using Geopandas
-CN_shp = gpd.read_file(shapefile)
-CN_shp= CN_shp.rename(columns={'NAME_0': 'COUNTRY'})
-CN_shp.drop(['adm0code'], axis = 1, inplace= True)
+CN_shp = shapes['cn']
 CN_shp
 
 
@@ -2190,13 +1749,7 @@ CN_shp
 # In[92]:
 
 
-# Copy relative path of .shp file
-shapefile = 'Resources\Channel-shp\cinms_py.shp'
-
-# Read shapefile using Geopandas
-ch_shp = gpd.read_file(shapefile)
-ch_shp= ch_shp.rename(columns={'AREA_NAME': 'COUNTRY'})                             # Rename column
-ch_shp.drop(['SANCTUARY', 'POLY_ID', 'DATUM'], axis = 1, inplace= True)             # Drop columns
+ch_shp = shapes['ch']                                                               # Area name as 'COUNTRY'
 ch_shp.drop([0], axis = 0, inplace = True)                                          # Drop row
 ch_shp.COUNTRY= ch_shp.COUNTRY.replace("Northern Section","Channel Islands")        # Rename 
 ch_shp
@@ -2208,32 +1761,20 @@ ch_shp
 
 
 # Macao Shapefile
-# Copy relative path of .shp file
-shapefile = 'Resources\Macao-shp\MAC_adm0.shp'
-
-# Read shapefile using Geopandas
-macao_shp = gpd.read_file(shapefile)
-macao_shp= macao_shp.rename(columns={'NAME_ENGLI': 'COUNTRY'})
-macao_shp.drop(macao_shp.iloc[:,:2], axis = 1, inplace= True)                           # Drop columns at index 0 and 1 (COUNTRY moves to index 0)
-macao_shp.drop(macao_shp.iloc[:,1:-1], axis = 1, inplace= True)                         # Drop columns at index 1 to -1
-macao_shp.COUNTRY= macao_shp.COUNTRY.replace("Northern Section","Channel Islands")
+macao_shp = shapes['macao']                                                             # Only the English name was read
 macao_shp
 
 
-# #### Concatenate Shapefile DataFrames
+# #### Combine Shapefile DataFrames
 
 # In[94]:
 
 
-shp_df = pd.concat([macao_shp, ch_shp, CN_shp, hk_shp], axis=0)  # Vertically stack DataFrames
-
-
-# In[95]:
-
-
-shp_df['COUNTRY'] =pd.Series(shp_df['COUNTRY'], dtype= "string")                        # Convert to string
-geo_global_data['COUNTRY'] =pd.Series(geo_global_data['COUNTRY'], dtype= "string")      # Convert to String
-shp_df.COUNTRY = shp_df.COUNTRY.str.strip()                                             # Strip strings
+# Build one GeoDataFrame from the names and geometries of the added shapefiles, string and strip 'COUNTRY'
+added_shps = [macao_shp, ch_shp, CN_shp, hk_shp]
+shp_df = norm_country(GeoDataFrame({'COUNTRY':  np.concatenate([shp['COUNTRY'].to_numpy() for shp in added_shps]),
+                                    'geometry': np.concatenate([shp.geometry.to_numpy() for shp in added_shps])},
+                                   crs=hk_shp.crs))
 
 
 # #### Update GeoDataFrame
@@ -2241,10 +1782,11 @@ shp_df.COUNTRY = shp_df.COUNTRY.str.strip()
 # In[96]:
 
 
-geo_global_data3= global_data.merge(shp_df, on='COUNTRY', how= 'left')      # Create new dataframe
-geo_global_data.update(geo_global_data3)                                    # Update 'geo_global_data'
+shp_geom = shp_df.drop_duplicates('COUNTRY').set_index('COUNTRY')['geometry']  # One geometry per added country
+added = geo_global_data['COUNTRY'].map(shp_geom)                                # Geometry where the country has an added shapefile
+geo_global_data['geometry'] = np.where(added.notna(), added, geo_global_data['geometry'])   # Added shapefiles take precedence
 
-dfi.export(geo_global_data, 'images/geoglobaldata.png', max_rows=10)
+export_table(geo_global_data, 'images/geoglobaldata.png', max_rows=10)
 geo_global_data.head()
 
 
@@ -2254,18 +1796,8 @@ geo_global_data.head()
 # DataFrame clean of all null values
 geoisnull = geo_global_data.isnull().any()
 
-#create a subplot without frame
-plot = plt.subplot(111, frame_on=False)
-
-#remove axis
-plot.xaxis.set_visible(False) 
-plot.yaxis.set_visible(False) 
-
-#create the table plot and position it in the upper left corner
-table(plot, geoisnull,loc='upper right')
-
-#save the plot as a png file
-plt.savefig('images/geoglobaldataisnull.png', bbox_inches = "tight")
+# Export null check table as png
+export_table(geoisnull.to_frame('is_null'), 'images/geoglobaldataisnull.png')
 
 
 # ### State Geospatial Data
@@ -2283,14 +1815,8 @@ us_data.head()
 # In[99]:
 
 
-# Instantiate Nominatim
-locator = Nominatim(user_agent="myGeocoder")
-
-# Gather longitude and latitude coordinates
-state_locs=[]                                                                   # Empty array
-for i in us_data.STATE:                                                         # Iterate through 'STATES'        
-        location = locator.geocode([i])                                         # Gather nominatim data for each state
-        state_locs.append([location.latitude, location.longitude])              # Append as tuples
+# Gather longitude and latitude coordinates through the same disk cache as the countries
+state_locs = cached_geocode(us_data.STATE)                                      # (latitude, longitude) for each state, in row order
 
 
 # In[100]:
@@ -2302,16 +1828,8 @@ state_locs
 # In[101]:
 
 
-# Create DataFrame with coordinates
-state_loc = pd.DataFrame(state_locs, columns = ['LAT', 'LONG']) 
-state_loc.head() 
-
-
-# In[102]:
-
-
 # Add coordinates to 'us_data' DataFrame
-us_data = us_data.join(state_loc)
+us_data['LAT'], us_data['LONG'] = state_locs.T
 us_data.head()
 
 
@@ -2320,11 +1838,7 @@ us_data.head()
 # In[103]:
 
 
-# Store relative path
-shapefile = 'Resources\stateshapes\cb_2018_us_state_500k.shp'
-
-# Read shapefile using Geopandas
-gdus = gpd.read_file(shapefile)
+gdus = shapes['us']
 gdus= gdus.rename(columns={'NAME': 'STATE'})
 gdus.head()
 
@@ -2374,7 +1888,7 @@ us_geodata.head()
 # In[109]:
 
 
-us_geodata[us_geodata.isna().any(axis=1)]
+us_geodata.loc[us_geodata.isna().to_numpy().any(axis=1)]
 
 
 # #### Manually Input Code and Shapefile for Washington, DC
@@ -2382,11 +1896,7 @@ us_geodata[us_geodata.isna().any(axis=1)]
 # In[110]:
 
 
-# Copy relative path of .shp file
-shapefile = 'Resources\Washington_DC_Boundary\Washington_DC_Boundary.shp'
-
-# Read shapefile using Geopandas
-dc_shp = gpd.read_file(shapefile)
+dc_shp = shapes['dc']
 dc_shp
 
 
@@ -2394,15 +1904,9 @@ dc_shp
 
 
 us_geodata.STATE = us_geodata.STATE.str.strip()
-us_geodata.set_index('STATE', inplace=True)
-us_geodata.at['District Of Columbia','geometry'] = dc_shp.iat[0,9]         # Locate cell and replace with value
-us_geodata.at['District Of Columbia','CODE'] = "DC"                        # Locate cell and replace with value
-
-
-# In[112]:
-
-
-us_geodata.reset_index(inplace= True)
+dc = us_geodata['STATE'].eq('District Of Columbia')                        # Boolean mask for the DC row
+us_geodata.loc[dc, 'geometry'] = dc_shp.geometry.iloc[0]                   # Fill in the missing shape
+us_geodata.loc[dc, 'CODE'] = 'DC'                                          # Fill in the missing state code
 
 
 # In[113]:
@@ -2410,35 +1914,40 @@ us_geodata.reset_index(inplace= True)
 
 usgeoisnull = us_geodata.isnull().any()
 
-#create a subplot without frame
-plot = plt.subplot(111, frame_on=False)
+# Export null check table as png
+export_table(usgeoisnull.to_frame('is_null'), 'images/geoisnull.png')
 
-#remove axis
-plot.xaxis.set_visible(False) 
-plot.yaxis.set_visible(False) 
 
-#create the table plot and position it in the upper left corner
-table(plot, usgeoisnull,loc='upper right')
+# In[114]:
 
-#save the plot as a png file
-plt.savefig('images/geoisnull.png', bbox_inches = "tight")
 
+export_table(us_geodata, 'images/usgeodata.png', max_rows=10)
 
-# In[114]:
 
+# ## GeoMap using Plotly
+# 
+# ---
+# 
+# The shapefile polygons are far more detailed than these maps can show. They are simplified once here and serialized to GeoJSON a single time, keyed by country name and state code, and every choropleth reuses the same GeoJSON. The exported datasets keep the full resolution geometry.
+
+# In[ ]:
 
-dfi.export(us_geodata, 'images/usgeodata.png', max_rows=10)
 
+# Tolerance is in degrees: coarser for the world map than for the US map
+world_shapes = geo_global_data.geometry.simplify(tolerance=0.05, preserve_topology=True)
+us_shapes = us_geodata.geometry.simplify(tolerance=0.02, preserve_topology=True)
+
+# Serialize once, each feature's id is the value passed as 'locations'
+world_geojson = json.loads(gpd.GeoSeries(world_shapes.values, index=geo_global_data['COUNTRY']).to_json())
+us_geojson = json.loads(gpd.GeoSeries(us_shapes.values, index=us_geodata['CODE']).to_json())
 
-# ## GeoMap using Plotly
 
 # In[115]:
 
 
 fig = px.choropleth(geo_global_data,                                        # Create Choropleth figure with Plotly Express
-                    geojson=geo_global_data.geometry,                       # Use geometry for geojson 
-                    locations=geo_global_data.COUNTRY,                      # Country names as locations
-                    locationmode='country names',                           # Set location mode to recognize country names
+                    geojson=world_geojson,                                  # Shared geojson of simplified geometry
+                    locations=geo_global_data.COUNTRY,                      # Country names match the geojson feature ids
                     color="TOTCASES_PER_1M",                                # Numerical values 
                     projection = "natural earth",                           # Map layout
                     width=900, 
@@ -2448,7 +1957,7 @@ fig = px.choropleth(geo_global_data,                                        # Cr
 
 #fig.update_geos(fitbounds="locations", visible=False)
 fig.update_layout(title_x=.5)                                               # Center title
-fig.show()
+if INTERACTIVE: fig.show()
 
 fig.write_image('images/totcasechloro.png')
 
@@ -2457,9 +1966,8 @@ fig.write_image('images/totcasechloro.png')
 
 
 fig = px.choropleth(geo_global_data, 
-                    geojson=geo_global_data.geometry, 
+                    geojson=world_geojson, 
                     locations=geo_global_data.COUNTRY, 
-                    locationmode='country names',
                     projection = "natural earth",
                     color="DEATH_PER_1M", 
                     width=900, 
@@ -2469,7 +1977,7 @@ fig = px.choropleth(geo_global_data,
 
 #fig.update_geos(fitbounds="locations", visible=False)
 fig.update_layout(title_x=.5)
-fig.show()
+if INTERACTIVE: fig.show()
 
 fig.write_image('images/totdeathchloro.png')
 
@@ -2479,9 +1987,13 @@ fig.write_image('images/totdeathchloro.png')
 
 px.set_mapbox_access_token("pk.eyJ1Ijoib21rYXJzMSIsImEiOiJja2x3b2VxZGYwZWNtMnVrdnl1aTFhYmoyIn0.y32QE3QdwHh-eoEVBJ5N1Q")
 
-fig = px.scatter_geo(geo_global_data,
-                    lat=geo_global_data.LAT,                # Latitutinal values
-                    lon=geo_global_data.LONG,               # Longitudinal values
+# Plain frame with only the plotted columns, so the polygons are not carried into the figure
+bubble_data = pd.DataFrame(geo_global_data[['COUNTRY', 'CONTINENT', 'POPULATION', 'TOTALCASES', 'TESTS_PER_1M',
+                                            'SURVIVAL_RATE', 'DEATH_RATE', 'ACTIVECASES', 'GDP_PER_CAPITA']])
+
+fig = px.scatter_geo(bubble_data,
+                    lat=geo_global_data['LAT'].to_numpy(np.float64),    # Latitutinal values
+                    lon=geo_global_data['LONG'].to_numpy(np.float64),   # Longitudinal values
                     hover_name="COUNTRY",                   # Hovering over point will display country
                     projection="natural earth",             # Map type
                     size = 'POPULATION',                    # Numerical value of population determines size of bubble
@@ -2503,7 +2015,7 @@ fig.update_traces(hovertemplate="<br>".join([
         "GDP PER CAPITA: %{customdata[6]}"
     ]))
 fig.update_layout(title_x=.5)
-fig.show()
+if INTERACTIVE: fig.show()
 
 fig.write_image('images/countrypopbubble.png')
 
@@ -2514,11 +2026,10 @@ fig.write_image('images/countrypopbubble.png')
 
 
 fig = px.choropleth(us_geodata,                                                                     # Create choropleth figure
-                    geojson=us_geodata.geometry,                                                    # Polygons for geojson
-                    locations=us_geodata.CODE,                                                      # ISO Code
+                    geojson=us_geojson,                                                             # Shared geojson of simplified polygons
+                    locations=us_geodata.CODE,                                                      # State codes match the geojson feature ids
                     color="TOTCASES_PER_1M",                                                        # Numerical measure
                     color_continuous_scale="Viridis",                                               # Color scheme for scale
-                    locationmode = "USA-states",                                                    # Will recognize state names as locations
                     scope="usa",                                                                    # Map will only disply United States
                     labels={'TOTCASES_PER_1M':'Total Confirmed Cases Per Million'},                 # Label for scale
                     title= 'Total Confirmed Cases by State',                                        # Plot title
@@ -2535,7 +2046,7 @@ fig.update_traces(hovertemplate="<br>".join([
     ]))
 
 fig.update_layout(title_x=.5)
-fig.show()
+if INTERACTIVE: fig.show()
 
 fig.write_image('images/statetotchloro.png')
 
@@ -2544,11 +2055,10 @@ fig.write_image('images/statetotchloro.png')
 
 
 fig = px.choropleth(us_geodata, 
-                    geojson=us_geodata.geometry, 
+                    geojson=us_geojson, 
                     locations=us_geodata.CODE, 
                     color="DEATH_PER_1M",
                     color_continuous_scale="Viridis",
-                    locationmode = "USA-states",
                     scope="usa",
                     labels={'DEATH_PER_1M':'Deaths per million'},
                     title= 'Deaths Per Million by State',
@@ -2564,7 +2074,7 @@ fig.update_traces(hovertemplate="<br>".join([
     ]))
 
 fig.update_layout(title_x=.5)
-fig.show() 
+if INTERACTIVE: fig.show()
 
 fig.write_image('images/statedeathchloro.png')
 